@@ -0,0 +1,28 @@
+"""
+Numerical tools for the Density Functional Theory project.
+
+The notebooks show how to set up and solve the Schrödinger equation as a
+matrix problem; this package collects those building blocks so that larger
+calculations do not have to copy notebook cells around.
+"""
+
+from .hamiltonian import Hamiltonian, KineticOperator, build_hamiltonian, second_derivative
+from .solvers import eigensolve
+from .potentials import (Potential, Constant, InfiniteWell, FiniteWell, DoubleWell, Harmonic,
+                         Coulomb, Piecewise)
+from .sweep import SweepResult, run_sweep, sweep_points
+from .grid import Grid
+from .convergence import converge
+from .batch import HamiltonianStack, solve_batch
+from .hartree import hartree, hartree_direct, hartree_fft, hartree_radial
+from .scf import SCFResult, scf
+from .radial import solve_atom
+from .xc import lda, pz81_correlation, slater_exchange
+from .groundstate import imaginary_time, lobpcg
+from .tdse import crank_nicolson, gaussian_packet, split_operator
+from .multidim import HamiltonianND, build_hamiltonian_nd, eigensolve_nd
+from .cache import SolutionCache
+from .store import StateStore
+from .analysis import canonical_signs, gram, observables
+from .scattering import resonances, transmission
+from .bands import BlochHamiltonian, band_structure
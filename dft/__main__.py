@@ -0,0 +1,7 @@
+"""Run a calculation from a configuration file; see :mod:`dft.cli`."""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
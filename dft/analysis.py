@@ -0,0 +1,126 @@
+"""
+Observables and checks on blocks of eigenvectors.
+
+The notebooks check orthonormality with a double loop,
+``np.sum(psi[j]*psi[i])`` for every pair, and look at the states one at a
+time. With the states stored as one block, shape (k, N) as returned by
+:func:`dft.solvers.eigensolve`, or (points, k, N) for the kept states of a
+sweep (``result.states.array()``), all of this is a handful of matrix
+products:
+
+* the overlaps <i|j> of every pair of states are the Gram matrix
+  ``psi @ psi.T`` (:func:`gram`);
+* since the eigenvectors are normalised with ``np.sum(psi**2) = 1``, the
+  probability density of state n at point i is just ``psi[n, i]**2``, with
+  the grid weights already included, and the expectation value of any
+  function of x is ``psi**2 @ f``. :func:`observables` stacks 1, x, x^2,
+  V and the indicator functions of the regions of interest into one
+  matrix and gets all of them for all the states in a single product;
+* <T> needs T psi, one banded multiply for the whole block.
+
+The sign of an eigenvector is arbitrary and can flip from one point of a
+sweep to the next. :func:`canonical_signs` fixes it the same way for every
+state, so plots and differences between points make sense.
+"""
+
+import numpy as np
+
+from . import profiling
+from .grid import Grid
+
+
+def _density(psi):
+    if np.iscomplexobj(psi):
+        return psi.real**2 + psi.imag**2
+    return psi*psi
+
+
+def gram(psi):
+    """
+    The overlaps <i|j> of every pair of states, shape (..., k, k), for
+    states of shape (..., k, N). The identity for orthonormal states.
+    """
+    psi = np.asarray(psi)
+    return psi.conj() @ np.swapaxes(psi, -1, -2)
+
+
+def orthonormality_error(psi):
+    """The largest deviation of the Gram matrix from the identity, per block."""
+    G = gram(psi)
+    return np.abs(G - np.eye(G.shape[-1])).max(axis=(-2, -1))
+
+
+def canonical_signs(psi, threshold=1e-3):
+    """
+    Flip the sign of each state so that its first lobe, the first point
+    where |psi| exceeds ``threshold`` times its maximum, is positive. For
+    states of shape (..., k, N); returns a new array.
+
+    This is how the states are usually drawn, and it is the same for every
+    point of a sweep, as long as the left-most lobe does not vanish.
+    """
+    psi = np.asarray(psi)
+    magnitude = np.abs(psi)
+    first = np.argmax(magnitude > threshold*magnitude.max(axis=-1, keepdims=True), axis=-1)
+    lobe = np.take_along_axis(psi, first[..., None], axis=-1)
+    return np.where(lobe.real < 0, -psi, psi)
+
+
+def observables(psi, x, H=None, V=None, regions=()):
+    """
+    Expectation values for every state of a block of eigenvectors.
+
+    Parameters
+    ----------
+    psi : array, shape (..., k, N)
+        Eigenvectors normalised as by :func:`dft.solvers.eigensolve`, real
+        or complex (e.g. the snapshots of :mod:`dft.tdse`).
+    x : array or Grid
+        The grid points.
+    H : Hamiltonian, optional
+        Gives <T> and, unless ``V`` is given, <V> and <E>.
+    V : array, shape (N,) or (..., N), optional
+        The potential, shared by all the blocks or one per block (e.g. one
+        per sweep point).
+    regions : sequence of (lo, hi)
+        Intervals of x to give the probability of finding the particle in.
+
+    Returns
+    -------
+    dict of arrays of shape (..., k)
+        ``norm``, ``x``, ``x2`` (<x^2>), ``width`` (the standard deviation
+        of x), ``P`` (shape (..., k, len(regions))) and, when they can be
+        computed, ``T``, ``V`` and ``E`` = <T> + <V>.
+    """
+    with profiling.stage("analysis"):
+        psi = np.asarray(psi)
+        x = x.x if isinstance(x, Grid) else np.asarray(x, dtype=float)
+        N = psi.shape[-1]
+        if V is None and H is not None:
+            V = H.V
+        shared = V is not None and np.ndim(V) == 1
+        # Every function of x whose expectation is wanted, as the rows of one
+        # matrix, so that a single product gives them all.
+        rows = [np.ones(N), x, x*x]
+        rows += [((x >= lo) & (x <= hi)).astype(float) for lo, hi in regions]
+        if shared:
+            rows.append(np.asarray(V, dtype=float))
+        F = np.array(rows)
+        density = _density(psi)
+        values = (density.reshape(-1, N) @ F.T).reshape(psi.shape[:-1] + (len(F),))
+        out = {"norm": values[..., 0], "x": values[..., 1], "x2": values[..., 2],
+               "P": values[..., 3:3+len(regions)]}
+        out["width"] = np.sqrt(np.maximum(out["x2"] - out["x"]**2, 0.))
+        if shared:
+            out["V"] = values[..., -1]
+        elif V is not None:
+            out["V"] = (density @ np.asarray(V, dtype=float)[..., None])[..., 0]
+        if H is not None:
+            # T applied to every state of every block at once, as the columns
+            # of an (N, ...) block.
+            flat = psi.reshape(-1, N)
+            Tpsi = H.kinetic.matvec(flat.T).T
+            out["T"] = np.einsum("ij,ij->i", flat.conj(), Tpsi).real.reshape(psi.shape[:-1])
+            if "V" in out:
+                out["E"] = out["T"] + out["V"]
+        return out
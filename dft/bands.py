@@ -0,0 +1,186 @@
+"""
+Periodic potentials and band structures.
+
+A lattice of wells, such as a row of double wells (the Kronig-Penney
+model), would need a box holding many cells before the hard walls stop
+mattering. By Bloch's theorem the states of a potential with period L can
+instead be written as
+
+    psi(x + L) = exp(i k L) psi(x),    -pi/L < k <= pi/L
+
+so only one unit cell is needed, at the price of solving once for each
+crystal momentum k. On N evenly spaced points x_0, ..., x_{N-1} of the cell,
+with h = L/N, the stencil of the second derivative wraps round from the
+last points to the first ones, picking up the phase exp(i k L) on the way.
+For the three point stencil H(k) is the cyclic tridiagonal matrix
+
+    [ d_0                t                  t exp(-i k L) ]
+    [ t                  d_1    ...                       ]
+    [          ...                        t               ]
+    [ t exp(i k L)              t           d_{N-1}       ]
+
+which is Hermitian, and complex unless k L is 0 or pi. The wider stencils
+wrap in the same way. The hard walls of
+:func:`dft.hamiltonian.second_derivative` are not used here.
+
+Each k is an independent problem of the size of one cell, so
+:func:`band_structure` spreads them over a pool of worker processes.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .hamiltonian import STENCILS
+
+# Up to this many points per cell a stack of dense eigvalsh calls beats
+# shift-invert Lanczos at every k (51 k-points, 5 bands: 0.14 s against
+# 0.17 s at 128 points, 0.55 s against 0.13 s at 256).
+DENSE_LIMIT = 128
+
+
+class BlochHamiltonian:
+    """
+    The Hamiltonians H(k) of a periodic potential.
+
+    Parameters
+    ----------
+    V : array
+        The potential on the N points ``x0 + L*np.arange(N)/N`` of one cell.
+    L : float
+        The period.
+    hbar, m : float
+    stencil : int
+        3, 5, 7 or 9 points, as for :func:`dft.hamiltonian.build_hamiltonian`.
+    """
+
+    def __init__(self, V, L, hbar=1., m=1., stencil=3):
+        if stencil not in STENCILS:
+            raise ValueError("unknown stencil {!r}, expected one of {}".format(stencil, sorted(STENCILS)))
+        self.V = np.asarray(V, dtype=float)
+        self.L = float(L)
+        c = np.array(STENCILS[stencil])
+        if self.N <= 2*(len(c)-1):
+            raise ValueError("a {} point stencil needs more than {} points".format(stencil, 2*(len(c)-1)))
+        h = self.L/self.N
+        # The kinetic coefficients t_0, t_1, ... of the stencil.
+        self.coefficients = -(hbar*hbar)/(2.0*m)*c/(h*h)
+
+    @property
+    def N(self):
+        return len(self.V)
+
+    @property
+    def shape(self):
+        return (self.N, self.N)
+
+    def matvec(self, psi, k):
+        """
+        Compute H(k).psi without forming H(k); ``psi`` is a vector of length
+        N or a block of shape (N, n).
+        """
+        psi = np.asarray(psi, dtype=complex)
+        V = self.V if psi.ndim == 1 else self.V[:, None]
+        out = (self.coefficients[0] + V)*psi
+        phase = np.exp(1j*k*self.L)
+        for j, t in enumerate(self.coefficients[1:], start=1):
+            # psi_{i+j}, with the points past the end of the cell brought
+            # round from its start by the Bloch phase, and psi_{i-j} likewise.
+            ahead = np.roll(psi, -j, axis=0)
+            ahead[-j:] *= phase
+            behind = np.roll(psi, j, axis=0)
+            behind[:j] /= phase
+            out += t*(ahead + behind)
+        return out
+
+    def to_sparse(self, k, format="csr"):
+        """H(k) as a complex scipy.sparse matrix."""
+        import scipy.sparse as sps
+        N = self.N
+        phase = np.exp(1j*k*self.L)
+        diags = [self.coefficients[0] + self.V]
+        offsets = [0]
+        for j, t in enumerate(self.coefficients[1:], start=1):
+            # Upper and lower diagonals, and the corners they wrap into.
+            diags += [np.full(N-j, t), np.full(N-j, t), np.full(j, t*phase), np.full(j, t/phase)]
+            offsets += [j, -j, j-N, N-j]
+        return sps.diags(diags, offsets, shape=(N, N), format=format, dtype=complex)
+
+    def to_dense(self, k):
+        """H(k) as a full complex N x N array."""
+        return self.to_sparse(k).toarray()
+
+
+def _solve_kpoints(H, kpoints, nbands, method):
+    # The lowest nbands energies at each of the k-points.
+    if method == "dense":
+        # Many matrices at once, since eigvalsh works on a whole stack, but
+        # few enough that the stack stays around 256 MB.
+        size = max(1, 2**24//(H.N*H.N))
+        E = [np.linalg.eigvalsh(np.array([H.to_dense(k) for k in kpoints[i:i+size]]))[:, :nbands]
+             for i in range(0, len(kpoints), size)]
+        return np.concatenate(E) if E else np.empty((0, nbands))
+    from scipy.sparse.linalg import eigsh
+    # Nothing lies below min(V), so shift-invert about a point just below
+    # it finds the lowest bands.
+    sigma = np.min(H.V) - 1.
+    E = np.empty((len(kpoints), nbands))
+    for i, k in enumerate(kpoints):
+        E[i] = np.sort(eigsh(H.to_sparse(k, "csc"), k=nbands, sigma=sigma, which="LM",
+                             return_eigenvectors=False).real)
+    return E
+
+
+def band_structure(V, L, N=None, nbands=5, kpoints=51, x0=None, hbar=1., m=1., stencil=3,
+                   processes=None, method="auto"):
+    """
+    The band energies E_n(k) of the potential ``V`` with period ``L``.
+
+    Parameters
+    ----------
+    V : Potential, callable or array
+        The potential of one cell: a function of x, evaluated on N points
+        starting at ``x0`` (default -L/2), or its N values there.
+    L : float
+        The period.
+    N : int
+        Points per cell; needed if V is a function.
+    nbands : int
+        Number of bands.
+    kpoints : int or array
+        The crystal momenta, or how many to spread evenly over the
+        Brillouin zone -pi/L <= k <= pi/L.
+    processes : int, optional
+        Number of worker processes; ``None`` uses one per CPU, and 1 solves
+        every k-point here.
+    method : str
+        ``"dense"`` (every H(k) of a worker diagonalised together),
+        ``"sparse"`` (shift-invert Lanczos) or ``"auto"``, which is dense
+        for cells of up to ``DENSE_LIMIT`` points.
+
+    Returns
+    -------
+    k : array
+        The k-points.
+    E : array, shape (len(k), nbands)
+        The band energies at each k-point.
+    """
+    if callable(V):
+        if N is None:
+            raise ValueError("give the number of points N to evaluate V on")
+        V = V((-L/2. if x0 is None else x0) + L*np.arange(N)/N)
+    H = BlochHamiltonian(V, L, hbar=hbar, m=m, stencil=stencil)
+    if np.ndim(kpoints) == 0:
+        kpoints = np.linspace(-np.pi/L, np.pi/L, kpoints)
+    kpoints = np.asarray(kpoints, dtype=float)
+    if method == "auto":
+        method = "dense" if H.N <= DENSE_LIMIT else "sparse"
+    if method not in ("dense", "sparse"):
+        raise ValueError("unknown method {!r}, expected 'auto', 'dense' or 'sparse'".format(method))
+    if processes == 1:
+        return kpoints, _solve_kpoints(H, kpoints, nbands, method)
+    chunks = np.array_split(kpoints, min(processes or os.cpu_count(), len(kpoints)))
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(_solve_kpoints, H, chunk, nbands, method) for chunk in chunks]
+        return kpoints, np.concatenate([f.result() for f in futures])
@@ -0,0 +1,210 @@
+"""
+Benchmarks of the Hamiltonian build and eigen-solve.
+
+For each test system (infinite well, finite well, double well), grid size N
+and solver, this records how long it takes to build H, how long it takes to
+solve for the lowest states, the peak memory allocated, and the largest
+error of the lowest energies against the analytic values in
+:mod:`dft.reference`. The solvers compared are
+
+    dense     the notebooks' np.diag construction and np.linalg.eigh
+    banded    banded H, full spectrum from scl.eigh_tridiagonal
+    partial   banded H, only the lowest k states (dft.solvers.eigensolve)
+    sparse    banded H, lowest k states by shift-invert Lanczos
+
+The dense and full spectrum solvers need O(N^2) memory, so they are skipped
+above ``dense_max`` and ``banded_max`` points.
+
+Run it from the command line and save the results for later comparison:
+
+    python -m dft.benchmark --out bench.json
+    python -m dft.benchmark --out new.json --compare bench.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+import scipy.linalg as scl
+
+from . import profiling
+from .grid import Grid
+from .hamiltonian import build_hamiltonian
+from .potentials import DoubleWell, FiniteWell
+from .reference import double_well_energies, finite_well_energies, infinite_well_energies
+from .solvers import eigensolve
+
+SIZES = (128, 512, 2048, 8192, 32768, 131072, 1048576)
+SOLVERS = ("dense", "banded", "partial", "sparse")
+
+
+def _infinite_well(N):
+    g = Grid.box(1., N)
+    return g, np.zeros(N), infinite_well_energies(1., 3)
+
+
+def _finite_well(N):
+    g = Grid.uniform(100., N)
+    return g, FiniteWell(V0=-6., b=2.)(g.x), finite_well_energies(-6., 2.)
+
+
+def _double_well(N):
+    g = Grid.uniform(100., N)
+    return g, DoubleWell(V0=-6., w=2., b=1.)(g.x), double_well_energies(-6., 2., 1.)
+
+
+SYSTEMS = {
+    "infinite_well": _infinite_well,
+    "finite_well": _finite_well,
+    "double_well": _double_well,
+}
+
+
+def _dense_build(x, V, hbar=1., m=1.):
+    # Exactly what the notebooks do.
+    N = len(x)
+    h = x[1]-x[0]
+    Mdd = 1./(h*h)*(np.diag(np.ones(N-1),-1) -2* np.diag(np.ones(N),0) + np.diag(np.ones(N-1),1))
+    return -(hbar*hbar)/(2.0*m)*Mdd + np.diag(V)
+
+
+def run_case(system, N, solver, k=3):
+    """
+    Benchmark one system, size and solver.
+
+    Returns a dict with the build and solve times (s), the peak memory
+    (bytes) and the largest error of the lowest k energies.
+    """
+    g, V, reference = SYSTEMS[system](N)
+    k = min(k, len(reference))
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        start = time.perf_counter()
+        with profiling.stage("build") as build:
+            if solver == "dense":
+                H = _dense_build(g.x, V)
+            else:
+                H = build_hamiltonian(g, V)
+        built = time.perf_counter()
+        with profiling.stage("solve") as solve:
+            if solver == "dense":
+                E = np.linalg.eigh(H)[0][:k]
+            elif solver == "banded":
+                E = scl.eigh_tridiagonal(H.bands[0], H.bands[1, :-1])[0][:k]
+            elif solver == "partial":
+                E = eigensolve(H, k=k)[0]
+            elif solver == "sparse":
+                E = eigensolve(H, k=k, method="sparse")[0]
+            else:
+                raise ValueError("unknown solver {!r}".format(solver))
+        solved = time.perf_counter()
+        memory = tracemalloc.get_traced_memory()[1]
+        if build.memory is not None:
+            # The stages reset the tracemalloc peak as they go, so the peak
+            # of the case is the larger of theirs.
+            memory = max(build.memory, solve.memory)
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return {"system": system, "N": N, "solver": solver, "k": k,
+            "build_time": built-start, "solve_time": solved-built, "memory": memory,
+            "error": float(np.max(np.abs(E - reference[:k])))}
+
+
+def run(sizes=SIZES, systems=tuple(SYSTEMS), solvers=SOLVERS, k=3,
+        dense_max=4096, banded_max=8192, repeat=1, verbose=False):
+    """
+    Run the benchmarks and return the results as a dict ready for JSON.
+
+    Each case is run ``repeat`` times and the fastest run is kept.
+    """
+    results = []
+    for system in systems:
+        for N in sizes:
+            for solver in solvers:
+                if solver == "dense" and N > dense_max or solver == "banded" and N > banded_max:
+                    continue
+                runs = [run_case(system, N, solver, k) for _ in range(repeat)]
+                best = min(runs, key=lambda r: r["build_time"] + r["solve_time"])
+                results.append(best)
+                if verbose:
+                    print(_format(best), flush=True)
+    return {"meta": _metadata(), "results": results}
+
+
+def _metadata():
+    return {"python": sys.version.split()[0], "numpy": np.__version__, "scipy": scipy.__version__,
+            "platform": platform.platform(), "machine": platform.machine(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def _format(r):
+    return "{:<14} {:>8} {:<8} build {:9.4f}s  solve {:9.4f}s  memory {:9.2f} MB  error {:9.2e}".format(
+        r["system"], r["N"], r["solver"], r["build_time"], r["solve_time"], r["memory"]/1e6, r["error"])
+
+
+def compare(old, new, threshold=1.2):
+    """
+    Compare two sets of benchmark results and list the cases that became
+    slower (total time) or used more memory by more than ``threshold`` times,
+    or whose error grew.
+    """
+    before = {(r["system"], r["N"], r["solver"]): r for r in old["results"]}
+    regressions = []
+    for r in new["results"]:
+        key = (r["system"], r["N"], r["solver"])
+        if key not in before:
+            continue
+        b = before[key]
+        time_ratio = (r["build_time"]+r["solve_time"])/max(b["build_time"]+b["solve_time"], 1e-9)
+        memory_ratio = r["memory"]/max(b["memory"], 1)
+        if time_ratio > threshold or memory_ratio > threshold or r["error"] > threshold*b["error"] + 1e-12:
+            regressions.append({"case": key, "time_ratio": time_ratio, "memory_ratio": memory_ratio,
+                                "error_before": b["error"], "error_after": r["error"]})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--systems", nargs="+", default=list(SYSTEMS), choices=list(SYSTEMS))
+    parser.add_argument("--solvers", nargs="+", default=list(SOLVERS), choices=list(SOLVERS))
+    parser.add_argument("-k", type=int, default=3, help="number of energies to check")
+    parser.add_argument("--dense-max", type=int, default=4096)
+    parser.add_argument("--banded-max", type=int, default=8192)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--out", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="report regressions against this JSON file")
+    parser.add_argument("--profile", metavar="JSON",
+                        help="also record every stage (see dft.profiling) and save the report here")
+    args = parser.parse_args(argv)
+    if args.profile:
+        profiling.enable()
+
+    results = run(args.sizes, args.systems, args.solvers, args.k, args.dense_max,
+                  args.banded_max, args.repeat, verbose=True)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.profile:
+        print(profiling.format_report())
+        profiling.save_report(args.profile)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results)
+        for r in regressions:
+            print("regression:", r)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+An on-disk cache of solved Hamiltonians.
+
+Re-running a notebook, or a sweep that overlaps an earlier one, solves the
+same Hamiltonians again. A :class:`SolutionCache` remembers the energies and
+eigenvectors of every Hamiltonian it has seen, keyed by a hash of the
+Hamiltonian itself (the kinetic bands, which depend on the grid, stencil,
+hbar and m, and the potential on the grid) and of the states asked for. Any
+change to any of them gives a different key, so a stale result is never
+returned.
+
+    cache = SolutionCache("solutions")
+    E, psi = eigensolve(H, k=5, cache=cache)   # solved and stored
+    E, psi = eigensolve(H, k=5, cache=cache)   # read back from disk
+
+By default the eigenvectors are stored as plain ``.npy`` files and are
+memory-mapped when read, so a cache hit only reads the parts of psi that
+are actually used; they are then read-only. With ``compress=True`` each
+entry is one compressed ``.npz`` file instead, which is smaller but has to
+be read in full. When the cache grows beyond ``max_bytes`` the least
+recently used entries are deleted.
+
+The cache is just a directory, so it can be shared by the worker processes
+of a sweep and kept between sessions.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+
+class SolutionCache:
+    """
+    A directory of cached solutions.
+
+    Parameters
+    ----------
+    directory : str
+        Where to keep the files; created if needed.
+    max_bytes : int
+        Largest total size of the cache before old entries are evicted.
+    compress : bool
+        Store compressed ``.npz`` files rather than memory-mappable ``.npy``.
+    """
+
+    def __init__(self, directory, max_bytes=2**30, compress=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(H, k=None, emax=None):
+        """A hash of the Hamiltonian ``H`` and of the states asked for."""
+        digest = hashlib.blake2b(digest_size=20)
+        arrays = [H.kinetic.bands, H.V]
+        if H.kinetic.overlap is not None:
+            arrays.append(H.kinetic.overlap)
+        for a in arrays:
+            a = np.ascontiguousarray(a, dtype=float)
+            digest.update(repr(a.shape).encode())
+            digest.update(a.tobytes())
+        digest.update(repr((k, emax)).encode())
+        return digest.hexdigest()
+
+    def _files(self, key):
+        base = os.path.join(self.directory, key)
+        if self.compress:
+            return [base + ".npz"]
+        return [base + ".E.npy", base + ".psi.npy"]
+
+    def get(self, key):
+        """The cached ``(E, psi)`` for ``key``, or None."""
+        files = self._files(key)
+        try:
+            if self.compress:
+                with np.load(files[0]) as data:
+                    E, psi = data["E"], data["psi"]
+            else:
+                E = np.load(files[0])
+                psi = np.load(files[1], mmap_mode="r")
+        except (FileNotFoundError, ValueError, OSError):
+            # Missing, or evicted by another process half way through.
+            self.misses += 1
+            return None
+        # Mark the entry as recently used.
+        for f in files:
+            try:
+                os.utime(f)
+            except OSError:
+                pass
+        self.hits += 1
+        return E, psi
+
+    def put(self, key, E, psi):
+        """Store ``(E, psi)`` under ``key``, then evict old entries if needed."""
+        files = self._files(key)
+        if self.compress:
+            tmp = files[0] + ".tmp.npz"
+            np.savez_compressed(tmp, E=E, psi=psi)
+            os.replace(tmp, files[0])
+        else:
+            for f, a in zip(files, (E, psi)):
+                tmp = f + ".tmp.npy"
+                np.save(tmp, a)
+                os.replace(tmp, f)
+        self.evict()
+
+    def entries(self):
+        """
+        The entries as a list of ``(last_used, size, files)``, oldest first.
+        """
+        groups = {}
+        for name in os.listdir(self.directory):
+            if ".tmp." in name or not name.endswith((".npy", ".npz")):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            used, size, files = groups.get(name.split(".")[0], (0., 0, []))
+            groups[name.split(".")[0]] = (max(used, stat.st_mtime), size + stat.st_size, files + [path])
+        return sorted(groups.values(), key=lambda e: e[0])
+
+    @property
+    def size(self):
+        """The total size of the cache in bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, files in entries:
+            if total <= self.max_bytes:
+                break
+            for f in files:
+                try:
+                    os.remove(f)
+                except FileNotFoundError:
+                    pass
+            total -= size
+
+    def clear(self):
+        """Delete every entry."""
+        for _, _, files in self.entries():
+            for f in files:
+                os.remove(f)
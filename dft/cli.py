@@ -0,0 +1,246 @@
+"""
+Run calculations from a configuration file, without a notebook.
+
+    python -m dft double_well.toml
+    python -m dft double_well.toml --figures --processes 8
+
+The file describes the grid, the potential, the solver and optionally a
+sweep over some of the potential's parameters, in TOML (or YAML, if PyYAML
+is installed):
+
+    [grid]
+    N = 2048
+    a = 100.0
+    stencil = 3
+
+    [potential]
+    type = "DoubleWell"      # any class in dft.potentials
+    V0 = -6.0
+    w = 2.0
+
+    [solver]
+    k = 4
+    keep_states = [0, 1]
+
+    [sweep]
+    b = {start = 0.1, stop = 5.0, num = 50}   # or a list of values
+    processes = 4
+
+    [output]
+    directory = "results"
+    name = "double_well"
+
+    [figures]
+    energies = true
+    wavefunctions = true
+    format = "pdf"
+
+``hbar`` and ``m`` can be set at the top level of the file. Every
+calculation is run as a sweep (:func:`dft.sweep.run_sweep`; with no
+``[sweep]`` table it has a single point), so the results are saved as they
+come in and an interrupted run picks up where it left off. The numbers go
+to ``<name>.npz`` (with the kept states in ``<name>.states.npy``) and a
+table of the energies to ``<name>.csv``.
+
+The notebooks draw and save a figure inside the solve loop, so every point
+waits for matplotlib. Here matplotlib is not imported at all while solving.
+Figures are only drawn when asked for (``[figures]`` or ``--figures``), in a
+second stage after all the points are solved, by a pool of worker
+processes using the non-interactive Agg backend, one figure per task.
+``--figures-only`` redraws them from saved results, and ``--profile``
+reports how long each stage took (see :mod:`dft.profiling`).
+"""
+
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import potentials, profiling
+from .sweep import SweepResult, run_sweep, sweep_points
+
+
+def load_config(path):
+    """Read a run description from a ``.toml``, ``.yaml`` or ``.yml`` file."""
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("reading {} needs PyYAML; use a .toml file instead".format(path))
+        with open(path) as f:
+            return yaml.safe_load(f) or {}
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise ImportError("reading {} needs Python 3.11 or the tomli package".format(path))
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def build_potential(spec):
+    """
+    The potential described by ``spec``: a dict with the name of a class in
+    :mod:`dft.potentials` under ``type`` and its parameters, or a list of
+    such dicts, which are added together.
+    """
+    if isinstance(spec, list):
+        return sum(build_potential(s) for s in spec)
+    spec = dict(spec)
+    name = spec.pop("type")
+    cls = getattr(potentials, name, None)
+    if not (isinstance(cls, type) and issubclass(cls, potentials.Potential)):
+        raise ValueError("unknown potential {!r}".format(name))
+    return cls(**spec)
+
+
+def _values(v):
+    # A list of values, or {start, stop, num} for evenly spaced ones.
+    if isinstance(v, dict):
+        return [float(x) for x in np.linspace(v["start"], v["stop"], int(v["num"]))]
+    return list(v) if isinstance(v, (list, tuple)) else [v]
+
+
+def _paths(config):
+    out = config.get("output", {})
+    directory = out.get("directory", ".")
+    return directory, os.path.join(directory, out.get("name", "result"))
+
+
+def run_config(config, processes=None, verbose=False):
+    """
+    Solve the calculation described by ``config`` (see :func:`load_config`)
+    and save the results. Returns the :class:`dft.sweep.SweepResult`.
+    """
+    grid = config.get("grid", {})
+    solver = dict(config.get("solver", {}))
+    sweep = dict(config.get("sweep", {}))
+    if processes is None:
+        processes = sweep.pop("processes", None)
+    else:
+        sweep.pop("processes", None)
+    continuation = sweep.pop("continuation", False)
+    points = sweep_points(**{name: _values(v) for name, v in sweep.items()})
+    directory, base = _paths(config)
+    os.makedirs(directory, exist_ok=True)
+    result = run_sweep(build_potential(config["potential"]), points,
+                       N=int(grid.get("N", 2048)), a=float(grid.get("a", 100.)),
+                       k=int(solver.get("k", 5)), emax=solver.get("emax"),
+                       keep_states=solver.get("keep_states"), processes=processes,
+                       path=base + ".npz", hbar=float(config.get("hbar", 1.)),
+                       m=float(config.get("m", 1.)), method=solver.get("method", "auto"),
+                       stencil=grid.get("stencil", 3), continuation=continuation)
+    with profiling.stage("save"), open(base + ".csv", "w", newline="") as f:
+        table = result.columns()
+        writer = csv.writer(f)
+        writer.writerow(list(table))
+        writer.writerows(zip(*table.values()))
+    if verbose:
+        print("solved {} point(s), results in {}.npz".format(len(result), base))
+    return result
+
+
+def _draw(task, config, fmt):
+    # One figure, in a worker process. Only here is matplotlib imported.
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    from .analysis import canonical_signs
+    from .grid import Grid
+
+    _, base = _paths(config)
+    result = SweepResult.load(base + ".npz", mode="r")
+    kind, i = task
+    with profiling.stage("plot"):
+        fig, ax = plt.subplots()
+        if kind == "energies":
+            names = list(result.points[0]) if result.points else []
+            x = np.array([p[names[0]] for p in result.points]) if len(names) == 1 else np.arange(len(result))
+            E = result.tracked_energies() if config.get("sweep", {}).get("continuation") else result.energies
+            ax.plot(x, E, marker="." if len(x) < 50 else None)
+            ax.set_xlabel(names[0] if len(names) == 1 else "point")
+            ax.set_ylabel("E")
+            name = "{}_energies.{}".format(base, fmt)
+        else:
+            grid = config.get("grid", {})
+            params = dict(result.points[i])
+            N = int(params.pop("N", grid.get("N", 2048)))
+            a = float(params.pop("a", grid.get("a", 100.)))
+            g = Grid(np.linspace(-a/2., a/2., N))
+            potential = build_potential(config["potential"])
+            V = (potential.replace(**params) if params else potential)(g.x)
+            ax.plot(g.x, V, color="k", lw=1)
+            psi = g.wavefunction(canonical_signs(result.states[i]))
+            for j, n in enumerate(result.keep_states):
+                ax.plot(g.x, psi[j] + result.energies[i, n], label="n = {}".format(n))
+            ax.set_xlabel("x")
+            ax.set_title(", ".join("{} = {:g}".format(p, v) for p, v in result.points[i].items()))
+            ax.legend()
+            name = "{}_wavefunctions_{}.{}".format(base, i, fmt)
+        fig.savefig(name)
+        plt.close(fig)
+        return name
+
+
+def render(config, processes=None, verbose=False):
+    """
+    Draw the figures asked for in ``config`` from the saved results, in
+    parallel. Returns the names of the files written.
+    """
+    figures = config.get("figures", {})
+    _, base = _paths(config)
+    result = SweepResult.load(base + ".npz", mode="r")
+    tasks = []
+    if figures.get("energies", True):
+        tasks.append(("energies", None))
+    if figures.get("wavefunctions", False):
+        if result.keep_states is None:
+            raise ValueError("wavefunction figures need solver.keep_states")
+        tasks += [("wavefunctions", i) for i in np.flatnonzero(result.done)]
+    fmt = figures.get("format", "pdf")
+    processes = figures.get("processes") if processes is None else processes
+    if processes == 1:
+        names = [_draw(task, config, fmt) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [profiling.submit(pool, _draw, task, config, fmt) for task in tasks]
+            names = [f.result() for f in futures]
+    if verbose:
+        print("wrote {} figure(s)".format(len(names)))
+    return names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("config", help="the run description, a .toml or .yaml file")
+    parser.add_argument("--processes", type=int, help="worker processes for solving and drawing")
+    parser.add_argument("--figures", action="store_true", help="draw the figures after solving")
+    parser.add_argument("--no-figures", action="store_true", help="do not draw any figures")
+    parser.add_argument("--figures-only", action="store_true",
+                        help="only draw the figures, from saved results")
+    parser.add_argument("--profile", metavar="JSON",
+                        help="time every stage, print a report and save it to this file")
+    args = parser.parse_args(argv)
+    if args.profile:
+        profiling.enable()
+
+    config = load_config(args.config)
+    if not args.figures_only:
+        run_config(config, processes=args.processes, verbose=True)
+    draw = args.figures or args.figures_only or ("figures" in config and not args.no_figures)
+    if draw:
+        render(config, processes=args.processes, verbose=True)
+    if args.profile:
+        print(profiling.format_report())
+        profiling.save_report(args.profile)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Automatic grid convergence.
+
+The notebook advice is to "start with a small number N and then increase it
+until the accuracy is acceptable". :func:`converge` does that for us: it
+solves the same potential on grids of N0, 2 N0, 4 N0, ... points, estimates
+the error in each energy from the change between grids, and stops at the
+first grid where every requested energy is within the tolerance.
+
+The error of a stencil of order p falls off as h^p, so two grids with
+spacings h_1 > h_2 = h_1/r give the Richardson estimate
+
+    E_exact ~ E_2 + (E_2 - E_1)/(r^p - 1)
+
+and (E_2 - E_1)/(r^p - 1) is the error estimate for E_2.
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+
+from . import profiling
+from .grid import Grid
+from .hamiltonian import build_hamiltonian
+from .solvers import eigensolve
+
+# How fast the error falls off with the step size for each stencil.
+STENCIL_ORDER = {3: 2, 5: 4, 7: 6, 9: 8, "numerov": 4}
+
+
+class ConvergenceResult:
+    """
+    The outcome of :func:`converge`.
+
+    Attributes
+    ----------
+    levels : list of dict
+        One entry per grid tried, with ``N``, ``h``, ``energies``,
+        ``extrapolated`` and ``error`` (NaN for the first grid),
+        ``observed_order`` (NaN for the first two grids), ``time`` (seconds)
+        and ``memory`` (peak bytes allocated during the solve).
+    converged : bool
+        Whether the tolerance was met.
+    """
+
+    def __init__(self, levels, converged, tol):
+        self.levels = levels
+        self.converged = converged
+        self.tol = tol
+
+    @property
+    def N(self):
+        """The number of points of the last (cheapest converged) grid."""
+        return self.levels[-1]["N"]
+
+    @property
+    def energies(self):
+        """The energies on the last grid."""
+        return self.levels[-1]["energies"]
+
+    @property
+    def extrapolated(self):
+        """The Richardson extrapolated energies from the last two grids."""
+        return self.levels[-1]["extrapolated"]
+
+    @property
+    def error(self):
+        """The estimated error of each energy on the last grid."""
+        return self.levels[-1]["error"]
+
+    def report(self):
+        """A table of the grids tried, as a string."""
+        lines = ["{:>9} {:>12} {:>12} {:>10} {:>9} {:>10}".format(
+            "N", "h", "max error", "order", "time (s)", "memory (MB)")]
+        for level in self.levels:
+            lines.append("{:>9d} {:>12.4e} {:>12.4e} {:>10.2f} {:>9.3f} {:>10.2f}".format(
+                level["N"], level["h"], np.max(level["error"]), np.min(level["observed_order"]),
+                level["time"], level["memory"]/1e6))
+        lines.append("converged to {:g}: {}".format(self.tol, self.converged))
+        return "\n".join(lines)
+
+
+def converge(potential, a, k=3, tol=1e-6, N0=64, factor=2, Nmax=2**20, stencil=3,
+             grid=Grid.uniform, order=None, hbar=1., m=1., method="auto"):
+    """
+    Find the cheapest grid on which the lowest k energies are within ``tol``.
+
+    Parameters
+    ----------
+    potential : callable
+        The potential, e.g. a :class:`dft.potentials.Potential`.
+    a : float
+        Size of the space.
+    k : int
+        Number of energies to converge.
+    tol : float
+        Largest acceptable error estimate for any of the k energies.
+    N0, factor, Nmax : int
+        The grids have N0, N0*factor, N0*factor^2, ... points, up to Nmax.
+    stencil : int or str
+        The second derivative stencil, see :func:`dft.hamiltonian.build_hamiltonian`.
+    grid : callable
+        ``grid(a, N)`` makes the grid, e.g. :meth:`Grid.uniform` (the
+        default) or :meth:`Grid.box` for an infinite well.
+    order : float, optional
+        The order p of the error used for extrapolation. The default is the
+        order of the stencil. A potential with jumps, like a square well,
+        can converge more slowly than that; compare ``observed_order`` in
+        the levels.
+
+    Returns
+    -------
+    ConvergenceResult
+    """
+    p = STENCIL_ORDER[stencil] if order is None else order
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    levels = []
+    try:
+        N = N0
+        while N <= Nmax:
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            with profiling.stage("converge") as stage:
+                g = grid(a, N)
+                H = build_hamiltonian(g, potential(g.x), hbar=hbar, m=m, stencil=stencil)
+                E, psi = eigensolve(H, k=k, method=method)
+            elapsed = time.perf_counter() - start
+            memory = tracemalloc.get_traced_memory()[1]
+            if stage.memory is not None:
+                # The stages inside reset the tracemalloc peak as they go;
+                # this one keeps the largest of theirs.
+                memory = stage.memory
+            del H, psi
+
+            h = np.min(g.spacing)
+            level = {"N": N, "h": h, "energies": E, "time": elapsed, "memory": memory,
+                     "extrapolated": np.full(k, np.nan), "error": np.full(k, np.inf),
+                     "observed_order": np.full(k, np.nan)}
+            if levels:
+                previous = levels[-1]
+                r = previous["h"]/h
+                change = E - previous["energies"]
+                level["error"] = np.abs(change)/(r**p - 1.)
+                level["extrapolated"] = E + change/(r**p - 1.)
+                if len(levels) > 1:
+                    before = previous["energies"] - levels[-2]["energies"]
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        level["observed_order"] = np.log(np.abs(before/change))/np.log(r)
+            levels.append(level)
+            if np.all(level["error"] <= tol):
+                return ConvergenceResult(levels, True, tol)
+            N *= factor
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return ConvergenceResult(levels, False, tol)
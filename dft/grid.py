@@ -0,0 +1,134 @@
+"""
+Grids of points for the finite difference Hamiltonians.
+
+The notebooks use evenly spaced points, ``x = np.linspace(-a/2., a/2., N)``.
+For a small well in a big box most of those points sit where the
+wavefunction is practically zero. A non-uniform grid puts the points where
+they are needed, near the wells, and spreads them out further away.
+
+On a non-uniform grid each point i stands for a stretch of space of length
+
+    w_i = (h_{i-1} + h_i)/2
+
+where h_i = x_{i+1} - x_i. These weights replace the single step size h: an
+integral becomes ``np.sum(w*f)``, and the eigenvectors returned by the
+solvers are normalised with ``np.sum(psi**2) = 1``, so the wavefunction to
+plot is ``psi/np.sqrt(w)`` (which is the notebooks' ``psi/np.sqrt(h)`` on an
+even grid). :meth:`Grid.wavefunction` does this.
+"""
+
+import numpy as np
+
+
+class Grid:
+    """
+    A set of points ``x`` with hard walls one step beyond each end.
+
+    Parameters
+    ----------
+    x : array
+        The points, in increasing order.
+    left, right : float, optional
+        Distance from the first (last) point to the wall. The default is the
+        first (last) spacing, which is what the notebooks do.
+    """
+
+    def __init__(self, x, left=None, right=None):
+        x = np.asarray(x, dtype=float)
+        if x.ndim != 1 or len(x) < 3:
+            raise ValueError("a grid needs at least 3 points")
+        h = np.diff(x)
+        if np.any(h <= 0):
+            raise ValueError("grid points must be in increasing order")
+        self.x = x
+        self.left = h[0] if left is None else float(left)
+        self.right = h[-1] if right is None else float(right)
+
+    @classmethod
+    def uniform(cls, a, N, center=0.):
+        """N evenly spaced points from -a/2 to a/2, as in the notebooks."""
+        return cls(center + np.linspace(-a/2., a/2., N))
+
+    @classmethod
+    def box(cls, a, N, center=0.):
+        """
+        N evenly spaced points inside a box with walls at -a/2 and a/2,
+        i.e. the inner points of ``np.linspace(-a/2., a/2., N+2)``.
+        """
+        return cls(center + np.linspace(-a/2., a/2., N+2)[1:-1])
+
+    @classmethod
+    def sinh(cls, a, N, stretch=3., center=0.):
+        """
+        N points from -a/2 to a/2, bunched up around ``center``.
+
+        The points are x = a/2 sinh(stretch*s)/sinh(stretch) for evenly spaced
+        s from -1 to 1, so the spacing at the edges is cosh(stretch) times
+        the spacing in the middle.
+        """
+        s = np.linspace(-1., 1., N)
+        return cls(center + a/2.*np.sinh(stretch*s)/np.sinh(stretch))
+
+    @classmethod
+    def refined(cls, a, N, features, width=1., ratio=10., center=0.):
+        """
+        N points from -a/2 to a/2, packed ``ratio`` times more densely
+        within about ``width`` of each of the positions in ``features``
+        (e.g. the edges or centres of the wells).
+
+        The density of points changes smoothly, which keeps the finite
+        difference error small.
+        """
+        fine = center + np.linspace(-a/2., a/2., 50*N)
+        density = np.ones_like(fine)
+        for f in np.atleast_1d(features):
+            density = np.maximum(density, 1. + (ratio-1.)*np.exp(-((fine-f)/width)**2))
+        cumulative = np.concatenate(([0.], np.cumsum(0.5*(density[1:]+density[:-1])*np.diff(fine))))
+        return cls(np.interp(np.linspace(0., cumulative[-1], N), cumulative, fine))
+
+    @classmethod
+    def log(cls, rmin, rmax, N):
+        """
+        N logarithmically spaced points from ``rmin`` to ``rmax`` > 0, with
+        the left wall at the origin. This is the usual grid for radial
+        problems, fine near the nucleus and coarse far away.
+        """
+        r = np.geomspace(rmin, rmax, N)
+        return cls(r, left=r[0])
+
+    @property
+    def N(self):
+        return len(self.x)
+
+    @property
+    def spacing(self):
+        """The N+1 distances between neighbouring points, including the walls."""
+        return np.concatenate(([self.left], np.diff(self.x), [self.right]))
+
+    @property
+    def weights(self):
+        """The length of space each point stands for, (h_{i-1} + h_i)/2."""
+        h = self.spacing
+        return 0.5*(h[:-1] + h[1:])
+
+    @property
+    def is_uniform(self):
+        h = self.spacing
+        # Rounding the points leaves errors of about eps |x| in the steps,
+        # which on a long fine grid are more than 1e-10 h.
+        tol = 1e-10*h[0] + 8.*np.finfo(float).eps*np.abs(self.x).max()
+        return bool(np.all(np.abs(h - h[0]) <= tol))
+
+    def integrate(self, f):
+        """The integral of the values ``f`` on the grid."""
+        return np.sum(self.weights*f, axis=-1)
+
+    def wavefunction(self, psi):
+        """
+        Turn eigenvectors into wavefunctions normalised on this grid, so that
+        ``grid.integrate(grid.wavefunction(psi)**2) = 1``.
+        """
+        return psi/np.sqrt(self.weights)
+
+    def __len__(self):
+        return self.N
@@ -0,0 +1,146 @@
+"""
+Iterative solvers for the lowest few states that never form H.
+
+When only the ground state (or a few states) is wanted on a very large
+grid, even the banded eigensolvers do more work than necessary. The solvers
+here only need the product H.psi, computed from the bands as in
+:meth:`dft.hamiltonian.Hamiltonian.matvec`, and O(N) banded solves, so the
+memory stays O(kN) for k states.
+
+:func:`imaginary_time` evolves the Schrödinger equation in imaginary time,
+psi(t) = exp(-H t) psi(0). Every state decays like exp(-E_n t), so the
+ground state is the one that survives. Each step is a Crank-Nicolson step
+
+    (1 + dt/2 H) psi_new = (1 - dt/2 H) psi
+
+whose tridiagonal (or banded) matrix is LU factorised once and reused.
+Excited states are found together with the ground state, and after every
+step each one is Gram-Schmidt orthogonalised against those below it.
+
+:func:`lobpcg` uses the locally optimal block preconditioned conjugate
+gradient method from scipy, preconditioned with the inverse of the kinetic
+operator (shifted to make it positive definite), which removes the
+1/h^2 stiffness of the problem.
+
+Imaginary time is simple and robust for the ground state, but its time step
+has to shrink as the grid gets finer (see :func:`imaginary_time`) and it
+slows down badly for states close together in energy, such as a weakly
+bound state near the continuum. LOBPCG converges in tens of iterations
+whatever the grid, and is the better choice for excited states.
+"""
+
+import numpy as np
+
+from .hamiltonian import Hamiltonian
+from .solvers import _lower_bound
+
+
+def _initial_guess(N, k):
+    # The lowest k states of a box spanning the grid: smooth, and with the
+    # right number of nodes.
+    i = np.arange(1, N+1)
+    n = np.arange(1, k+1)
+    X = np.sin(np.pi*np.outer(i, n)/(N+1))
+    return X/np.linalg.norm(X, axis=0)
+
+
+def _gram_schmidt(X):
+    # Orthonormalise the columns of X in place, each against the ones before
+    # it (modified Gram-Schmidt).
+    for n in range(X.shape[1]):
+        for j in range(n):
+            X[:, n] -= (X[:, j] @ X[:, n])*X[:, j]
+        X[:, n] /= np.linalg.norm(X[:, n])
+    return X
+
+
+def _upper_bound(H):
+    # Gershgorin: no eigenvalue is above the largest diagonal entry plus the
+    # off-diagonal entries of its row.
+    bands = H.bands
+    N = H.N
+    bound = bands[0].copy()
+    for j in range(1, bands.shape[0]):
+        bound[:N-j] += np.abs(bands[j, :N-j])
+        bound[j:] += np.abs(bands[j, :N-j])
+    return bound.max()
+
+
+def _finish(H, X):
+    # Energies from the Rayleigh quotients, states in the eigensolve layout.
+    HX = H.matvec(X)
+    E = np.einsum("ij,ij->j", X, HX)
+    order = np.argsort(E)
+    residual = np.linalg.norm(HX - X*E, axis=0)
+    return E[order], X[:, order].T, residual[order]
+
+
+def imaginary_time(H, k=1, dt=None, tol=1e-8, maxiter=100000, guess=None):
+    """
+    The lowest k states of ``H`` by imaginary time propagation.
+
+    Parameters
+    ----------
+    H : Hamiltonian
+    k : int
+        Number of states.
+    dt : float, optional
+        The time step. Crank-Nicolson damps each state by a factor
+        (1 - dt l/2)/(1 + dt l/2) per step, where l is its energy above
+        the bottom of the spectrum. This tends to -1 for the highest states,
+        so dt has to be small enough that they still die away faster than
+        the k-th state, dt < 2/sqrt(l_k l_max). The default is half that,
+        with l_k from the guess and l_max from Gershgorin's theorem. It has
+        to be given for a Numerov Hamiltonian.
+    tol : float
+        Stop when |H psi - E psi| < tol max(1, |E|) for every state.
+    maxiter : int
+        Largest number of steps.
+    guess : array, shape (k, N), optional
+        Starting states; the default is the lowest states of a box.
+
+    Returns
+    -------
+    E, psi
+        As for :func:`dft.solvers.eigensolve`.
+    """
+    X = _initial_guess(H.N, k) if guess is None else _gram_schmidt(np.array(guess, dtype=float).T)
+    # Shift the spectrum so it is positive; this does not change the states.
+    shift = _lower_bound(H)
+    if dt is None:
+        if not H.is_banded:
+            raise ValueError("give dt for a Numerov Hamiltonian")
+        E = np.einsum("ij,ij->j", X, H.matvec(X))
+        dt = 1./np.sqrt((np.max(E) - shift)*(_upper_bound(H) - shift))
+    solve = H.shifted_solver(shift - 2./dt)
+    for it in range(maxiter):
+        # (1 + dt/2 (H - shift)) X_new = (1 - dt/2 (H - shift)) X, divided
+        # through by dt/2.
+        X = solve((2./dt + shift)*X - H.matvec(X))
+        X = _gram_schmidt(X)
+        if it % 10 == 0:
+            E, psi, residual = _finish(H, X)
+            if np.all(residual < tol*np.maximum(1., np.abs(E))):
+                return E, psi
+    raise RuntimeError("imaginary time propagation did not converge in {} steps".format(maxiter))
+
+
+def lobpcg(H, k=1, tol=1e-8, maxiter=500, guess=None):
+    """
+    The lowest k states of ``H`` by LOBPCG with a kinetic preconditioner.
+
+    Arguments and return values as for :func:`imaginary_time`.
+    """
+    from scipy.sparse.linalg import LinearOperator
+    from scipy.sparse.linalg import lobpcg as _lobpcg
+    X = _initial_guess(H.N, k) if guess is None else np.array(guess, dtype=float).T
+    # The inverse of T + c, with c at the depth of the potential so that it
+    # approximates (H - E)^-1 for the low states.
+    c = max(1., -np.min(H.V))
+    precondition = Hamiltonian(H.kinetic, np.zeros(H.N)).shifted_solver(-c)
+    M = LinearOperator(H.shape, matvec=precondition, matmat=precondition, dtype=float)
+    E, X = _lobpcg(H.aslinearoperator(), X, M=M, tol=tol, maxiter=maxiter, largest=False)
+    E, psi, residual = _finish(H, X)
+    if not np.all(residual < tol*np.maximum(1., np.abs(E))):
+        raise RuntimeError("LOBPCG did not converge in {} iterations".format(maxiter))
+    return E, psi
@@ -0,0 +1,375 @@
+"""
+Banded finite-difference Hamiltonians.
+
+The notebooks build the Hamiltonian as a dense N x N matrix,
+
+    Mdd = 1./(h*h)*(np.diag(np.ones(N-1),-1) -2* np.diag(np.ones(N),0) + np.diag(np.ones(N-1),1))
+    H = -(hbar*hbar)/(2.0*m)*Mdd + np.diag(V)
+
+but almost every entry of that matrix is zero. Here we only store the
+diagonals that are non-zero, so the memory used grows like N instead of N^2.
+
+The diagonals are kept in the "lower banded" layout used by scipy.linalg:
+``bands[0]`` is the main diagonal and ``bands[j][:N-j]`` is the j-th
+off-diagonal (the last j entries of that row are padding and are always 0).
+Since H is symmetric the upper off-diagonals are the same as the lower ones.
+
+Besides the three point stencil of the notebooks, the second derivative can
+use wider stencils (5, 7 or 9 points), whose error falls off as h^4, h^6 and
+h^8 instead of h^2, or Numerov's method. These reach the same accuracy with
+far fewer points.
+"""
+
+import numpy as np
+import scipy.linalg as scl
+
+from . import profiling
+from .grid import Grid
+
+# Central difference coefficients of the second derivative, c_0, c_1, ...,
+# such that f''_i = (c_0 f_i + sum_j c_j (f_{i+j} + f_{i-j}))/h^2.
+STENCILS = {
+    3: (-2., 1.),
+    5: (-5./2., 4./3., -1./12.),
+    7: (-49./18., 3./2., -3./20., 1./90.),
+    9: (-205./72., 8./5., -1./5., 8./315., -1./560.),
+}
+
+
+def second_derivative(N, h, stencil=3):
+    """
+    The second derivative operator ``Mdd`` in banded form.
+
+    Parameters
+    ----------
+    N : int
+        Number of points in the space.
+    h : float
+        Step size, ``x[1]-x[0]``.
+    stencil : int
+        Number of points in the stencil: 3 (as in the notebooks), 5, 7 or 9.
+
+    Returns
+    -------
+    bands : ndarray, shape (stencil//2+1, N)
+        The main diagonal and the off-diagonals.
+
+    Notes
+    -----
+    As in the notebooks, the wavefunction is zero at the (missing) points
+    just outside the grid, which act as hard walls. A wide stencil near a
+    wall also reaches points beyond the wall; for those we use the mirror
+    image of the wavefunction with its sign flipped, which is what a hard
+    wall does, so the accuracy holds right up to the edges of the grid.
+    """
+    if stencil not in STENCILS:
+        raise ValueError("unknown stencil {!r}, expected one of {}".format(stencil, sorted(STENCILS)))
+    c = STENCILS[stencil]
+    p = len(c)-1
+    if N <= 2*p:
+        raise ValueError("a {} point stencil needs more than {} points".format(stencil, 2*p))
+    bands = np.zeros((p+1, N))
+    for j in range(p+1):
+        bands[j, :N-j] = c[j]
+    # Images beyond the walls: the stencil reaches point i-j at or past the
+    # wall at -1, where psi_{i-j} = -psi_{-2-(i-j)}. Only the lower triangle
+    # is stored, and the right edge is the mirror image of the left one.
+    for i in range(p):
+        for j in range(i+2, p+1):
+            col = j-i-2
+            if col <= i:
+                bands[i-col, col] -= c[j]
+                bands[i-col, N-1-i] -= c[j]
+    return bands/(h*h)
+
+
+class KineticOperator:
+    """
+    The kinetic energy operator -hbar^2/(2m) d^2/dx^2 stored as bands.
+
+    The kinetic part of H does not depend on the potential, so it can be
+    built once for a grid and shared by many Hamiltonians (e.g. in a sweep
+    over the well depth). ``h`` is the step size, or None on a non-uniform
+    grid.
+
+    For Numerov's method the second derivative is B^-1 A, where A is the
+    three point stencil and B the tridiagonal matrix (1, 10, 1)/12. Then
+    ``bands`` holds -hbar^2/(2m) A and ``overlap`` holds B.
+    """
+
+    def __init__(self, bands, h, hbar=1., m=1., overlap=None):
+        self.bands = bands
+        self.h = h
+        self.hbar = hbar
+        self.m = m
+        self.overlap = overlap
+        if overlap is not None:
+            self._overlap_cholesky = scl.cholesky_banded(overlap, lower=True)
+
+    @classmethod
+    def from_grid(cls, x, hbar=1., m=1., stencil=3):
+        """
+        Build the kinetic operator for the points ``x``, with a
+        3, 5, 7 or 9 point stencil, or ``stencil="numerov"``.
+
+        ``x`` can also be a :class:`dft.grid.Grid`. Points that are not
+        evenly spaced, given either way, get the non-uniform three point
+        operator; the other stencils need even spacing.
+        """
+        if not isinstance(x, Grid):
+            x = Grid(x)
+        if not x.is_uniform:
+            if stencil != 3:
+                raise ValueError("a non-uniform grid only supports the 3 point stencil")
+            return cls._non_uniform(x, hbar, m)
+        h = x.spacing[0]
+        N = x.N
+        if stencil == "numerov":
+            bands = -(hbar*hbar)/(2.0*m)*second_derivative(N, h)
+            overlap = np.zeros((2, N))
+            overlap[0] = 10./12.
+            overlap[1, :N-1] = 1./12.
+            return cls(bands, h, hbar=hbar, m=m, overlap=overlap)
+        bands = -(hbar*hbar)/(2.0*m)*second_derivative(N, h, stencil)
+        return cls(bands, h, hbar=hbar, m=m)
+
+    @classmethod
+    def _non_uniform(cls, grid, hbar, m):
+        # The three point second derivative on uneven points is
+        #   f''_i = (f_{i+1}/h_i - (1/h_i + 1/h_{i-1}) f_i + f_{i-1}/h_{i-1})/w_i,
+        # which is not symmetric. Scaling the wavefunction by sqrt(w), i.e.
+        # using W^1/2 D W^-1/2, makes it symmetric without changing the
+        # energies, and the eigenvectors are then normalised with weights w.
+        h = grid.spacing
+        w = grid.weights
+        N = grid.N
+        bands = np.zeros((2, N))
+        bands[0] = -(1./h[1:] + 1./h[:-1])/w
+        bands[1, :N-1] = 1./(h[1:-1]*np.sqrt(w[1:]*w[:-1]))
+        return cls(-(hbar*hbar)/(2.0*m)*bands, None, hbar=hbar, m=m)
+
+    @property
+    def N(self):
+        return self.bands.shape[1]
+
+    @property
+    def bandwidth(self):
+        """Number of non-zero off-diagonals above (and below) the diagonal."""
+        return self.bands.shape[0] - 1
+
+    @property
+    def is_banded(self):
+        """False for Numerov's method, where the operator itself is dense."""
+        return self.overlap is None
+
+    def matvec(self, psi):
+        out = _banded_matvec(self.bands, psi)
+        if self.overlap is not None:
+            out = scl.cho_solve_banded((self._overlap_cholesky, True), out)
+        return out
+
+
+class Hamiltonian:
+    """
+    A Hamiltonian H = T + V where T is banded and V is diagonal.
+
+    Only the bands of T and the vector V are stored. Use :meth:`matvec` to
+    apply H to a wavefunction, :meth:`to_sparse` to get a scipy.sparse matrix
+    and :meth:`to_dense` if you really want the full N x N array (e.g. to
+    compare with ``np.linalg.eigh``).
+    """
+
+    def __init__(self, kinetic, V):
+        V = np.asarray(V, dtype=float)
+        if V.shape != (kinetic.N,):
+            raise ValueError("V has shape {} but the grid has {} points".format(V.shape, kinetic.N))
+        self.kinetic = kinetic
+        self.V = V
+
+    @property
+    def N(self):
+        return self.kinetic.N
+
+    @property
+    def shape(self):
+        return (self.N, self.N)
+
+    @property
+    def bandwidth(self):
+        return self.kinetic.bandwidth
+
+    @property
+    def is_banded(self):
+        return self.kinetic.is_banded
+
+    @property
+    def bands(self):
+        """The bands of H in lower banded form, shape (bandwidth+1, N)."""
+        self._check_banded()
+        bands = self.kinetic.bands.copy()
+        bands[0] += self.V
+        return bands
+
+    @property
+    def diagonal(self):
+        self._check_banded()
+        return self.kinetic.bands[0] + self.V
+
+    def _check_banded(self):
+        if not self.is_banded:
+            raise ValueError("a Numerov Hamiltonian is not banded; use matvec or shifted_solver")
+
+    def with_potential(self, V):
+        """A new Hamiltonian sharing this kinetic operator but with potential ``V``."""
+        return Hamiltonian(self.kinetic, V)
+
+    def matvec(self, psi):
+        """
+        Compute H.psi without forming H.
+
+        ``psi`` can be a single vector of length N or a block of shape (N, k),
+        in which case every column is multiplied.
+        """
+        psi = np.asarray(psi)
+        out = self.kinetic.matvec(psi)
+        if psi.ndim == 1:
+            out += self.V*psi
+        else:
+            out += self.V[:, None]*psi
+        return out
+
+    def shifted_solver(self, sigma):
+        """
+        A function that solves (H - sigma) y = b for y.
+
+        The banded matrix is LU factorised once, so each solve costs O(N).
+        This is what inverse iteration and shift-invert Lanczos need.
+        ``sigma`` can be complex (e.g. for Crank-Nicolson time steps), and
+        then so is the solution.
+        """
+        kinetic = self.kinetic
+        dtype = np.result_type(self.bands.dtype if self.is_banded else float, sigma)
+        if self.is_banded:
+            ab = _banded_full(self.bands).astype(dtype)
+            ab[self.bandwidth] -= sigma
+            return _banded_factor(ab, self.bandwidth)
+        # Numerov: H - sigma = B^-1 (A + B V - sigma B), and the matrix in
+        # brackets is tridiagonal (but not symmetric).
+        A, B = kinetic.bands, kinetic.overlap
+        ab = np.zeros((3, self.N), dtype=dtype)
+        ab[0, 1:] = A[1, :-1] + B[1, :-1]*(self.V[1:] - sigma)
+        ab[1] = A[0] + B[0]*(self.V - sigma)
+        ab[2, :-1] = A[1, :-1] + B[1, :-1]*(self.V[:-1] - sigma)
+        solve = _banded_factor(ab, 1)
+        return lambda b: solve(_banded_matvec(B, b))
+
+    def aslinearoperator(self):
+        """H as a scipy LinearOperator, for the iterative solvers."""
+        from scipy.sparse.linalg import LinearOperator
+        return LinearOperator(self.shape, matvec=self.matvec, matmat=self.matvec, dtype=float)
+
+    def to_sparse(self, format="csr"):
+        """H as a scipy.sparse matrix."""
+        import scipy.sparse as sps
+        bands = self.bands
+        N = self.N
+        diags = [bands[0]]
+        offsets = [0]
+        for j in range(1, bands.shape[0]):
+            diags += [bands[j, :N-j], bands[j, :N-j]]
+            offsets += [-j, j]
+        return sps.diags(diags, offsets, shape=(N, N), format=format)
+
+    def to_dense(self):
+        """H as a full N x N array, the same as the notebooks' ``H``."""
+        if not self.is_banded:
+            H = self.kinetic.matvec(np.eye(self.N)) + np.diag(self.V)
+            return 0.5*(H + H.T)
+        bands = self.bands
+        N = self.N
+        H = np.diag(bands[0])
+        for j in range(1, bands.shape[0]):
+            H += np.diag(bands[j, :N-j], j) + np.diag(bands[j, :N-j], -j)
+        return H
+
+
+def build_hamiltonian(x, V, hbar=1., m=1., stencil=3):
+    """
+    Build the Hamiltonian for the potential ``V`` on the points ``x``.
+
+    This is the banded version of
+
+        H = -(hbar*hbar)/(2.0*m)*Mdd + np.diag(V)
+
+    from the notebooks, with the wavefunction forced to zero just outside
+    the first and last point. ``stencil`` picks the second derivative: 3, 5,
+    7 or 9 points, or ``"numerov"``.
+
+    For the infinite square well of width a, the walls are one step beyond
+    the end points, so use the inner points of the box,
+    ``x = np.linspace(-a/2., a/2., N+2)[1:-1]`` (or ``Grid.box(a, N)``).
+
+    The points can also be unevenly spaced, as an array or a
+    :class:`dft.grid.Grid`; the eigenvectors are then normalised so that
+    ``grid.wavefunction(psi)`` integrates to 1.
+    """
+    with profiling.stage("hamiltonian"):
+        return Hamiltonian(KineticOperator.from_grid(x, hbar=hbar, m=m, stencil=stencil), V)
+
+
+def _banded_matvec(bands, psi):
+    # Multiply a symmetric matrix in lower banded form by a vector (or by
+    # every column of a block of vectors).
+    psi = np.asarray(psi)
+    N = bands.shape[1]
+    if psi.ndim == 1:
+        out = bands[0]*psi
+    else:
+        bands = bands[:, :, None]
+        out = bands[0]*psi
+    for j in range(1, bands.shape[0]):
+        b = bands[j, :N-j]
+        out[:N-j] += b*psi[j:]
+        out[j:] += b*psi[:N-j]
+    return out
+
+
+def _banded_full(bands):
+    # The (l, u) banded layout used by scl.solve_banded and LAPACK, built from
+    # the lower bands of a symmetric matrix.
+    p, N = bands.shape[0]-1, bands.shape[1]
+    ab = np.zeros((2*p+1, N), dtype=bands.dtype)
+    ab[p] = bands[0]
+    for j in range(1, p+1):
+        ab[p-j, j:] = bands[j, :N-j]
+        ab[p+j, :N-j] = bands[j, :N-j]
+    return ab
+
+
+def _banded_factor(ab, p):
+    # LU factorise a banded matrix with p bands either side of the diagonal,
+    # given in the layout of scl.solve_banded, and return a function that
+    # solves with it. The factorisation is only done once.
+    if p == 1:
+        # The tridiagonal routines are several times faster than the
+        # general banded ones.
+        gttrf, gttrs = scl.get_lapack_funcs(("gttrf", "gttrs"), (ab,))
+        dl, d, du, du2, piv, info = gttrf(ab[2, :-1], ab[1], ab[0, 1:])
+        if info > 0:
+            raise np.linalg.LinAlgError("the shifted Hamiltonian is singular")
+
+        def solve(b):
+            y, info = gttrs(dl, d, du, du2, piv, b)
+            return y
+        return solve
+    gbtrf, gbtrs = scl.get_lapack_funcs(("gbtrf", "gbtrs"), (ab,))
+    lu = np.zeros((3*p+1, ab.shape[1]), dtype=ab.dtype)
+    lu[p:] = ab
+    lu, piv, info = gbtrf(lu, p, p)
+    if info > 0:
+        raise np.linalg.LinAlgError("the shifted Hamiltonian is singular")
+
+    def solve(b):
+        y, info = gbtrs(lu, p, p, b, piv)
+        return y
+    return solve
@@ -0,0 +1,133 @@
+"""
+The Hartree potential of an electron density.
+
+``Methods.md`` writes the Hartree potential as a sum over the grid,
+
+    V_i = sum_j rho_j dx / sqrt((x_i - x_j)^2 + soft^2)
+
+which costs O(N^2) operations (and the notebook way of writing it, a full
+N x N matrix of 1/|x_i - x_j|, O(N^2) memory as well). Two faster ways are
+used here instead:
+
+* In 1D with the softened kernel, on an even grid the sum is a convolution
+  of rho with the kernel, which FFTs do in O(N log N) (:func:`hartree_fft`).
+* For a spherically symmetric density in 3D, the Poisson equation
+  ``laplacian V_H = -4 pi rho`` becomes, with u(r) = r V_H(r),
+
+      u''(r) = -4 pi r rho(r),    u(0) = 0,    u(R) = Q
+
+  where Q is the total charge inside R. The three point second derivative
+  turns this into a tridiagonal system, solved in O(N)
+  (:func:`hartree_radial`).
+
+:func:`hartree_direct` is the plain sum, kept for checking the others and
+for uneven 1D grids. Everything is in Hartree units. ``soft`` is a length:
+the ``epsilon`` of ``Equations.md`` is ``soft**2``.
+"""
+
+import numpy as np
+import scipy.linalg as scl
+
+from .grid import Grid
+
+# Rows of the O(N^2) sum done at a time, to keep the memory down.
+_CHUNK = 1024
+
+
+def _grid(x):
+    return x if isinstance(x, Grid) else Grid(x)
+
+
+def _check_soft(soft):
+    if soft <= 0:
+        raise ValueError("the 1D Hartree potential needs soft > 0, the bare 1/|x| kernel diverges")
+
+
+def hartree_direct(x, rho, soft=1.):
+    """
+    The softened 1D Hartree potential by direct summation, O(N^2).
+
+    ``x`` is an array of points or a :class:`dft.grid.Grid`; on an uneven
+    grid each point is weighted by ``grid.weights``.
+    """
+    _check_soft(soft)
+    g = _grid(x)
+    q = g.weights*np.asarray(rho, dtype=float)
+    V = np.empty(g.N)
+    for start in range(0, g.N, _CHUNK):
+        d = g.x[start:start+_CHUNK, None] - g.x[None, :]
+        V[start:start+_CHUNK] = (1./np.sqrt(d*d + soft*soft)) @ q
+    return V
+
+
+def hartree_fft(x, rho, soft=1.):
+    """
+    The softened 1D Hartree potential as an FFT convolution, O(N log N).
+
+    The points must be evenly spaced.
+    """
+    # scipy.signal is slow to import, so only when it is needed.
+    from scipy.signal import fftconvolve
+    _check_soft(soft)
+    g = _grid(x)
+    if not g.is_uniform:
+        raise ValueError("hartree_fft needs evenly spaced points, use hartree_direct")
+    N = g.N
+    h = g.spacing[0]
+    # The kernel at every separation from -(N-1) h to (N-1) h.
+    d = h*np.arange(-(N-1), N)
+    kernel = 1./np.sqrt(d*d + soft*soft)
+    return h*fftconvolve(np.asarray(rho, dtype=float), kernel)[N-1:2*N-1]
+
+
+def hartree(x, rho, soft=1.):
+    """
+    The softened 1D Hartree potential, by FFT on an even grid and by the
+    direct sum otherwise.
+    """
+    g = _grid(x)
+    if g.is_uniform:
+        return hartree_fft(g, rho, soft)
+    return hartree_direct(g, rho, soft)
+
+
+def hartree_radial(r, rho):
+    """
+    The Hartree potential of a spherically symmetric density, O(N).
+
+    Parameters
+    ----------
+    r : array or Grid
+        Radial points, r > 0, evenly spaced or not (e.g. logarithmic). For
+        an array the origin is taken as the left wall.
+    rho : array
+        The density (charge per unit volume) at each point. The density is
+        taken to be zero beyond the last point.
+
+    Returns
+    -------
+    V : array
+        V_H(r) at each point.
+    """
+    if isinstance(r, Grid):
+        g = r
+    else:
+        r = np.asarray(r, dtype=float)
+        g = Grid(r, left=r[0])
+    rho = np.asarray(rho, dtype=float)
+    h = g.spacing
+    w = g.weights
+    # The three point second derivative on uneven points, multiplied through
+    # by the weights w so that the matrix is symmetric:
+    #   u_{i+1}/h_i - (1/h_i + 1/h_{i-1}) u_i + u_{i-1}/h_{i-1} = -4 pi w_i r_i rho_i
+    # The matrix is negative definite, so solve with its negative.
+    bands = np.zeros((2, g.N))
+    bands[0] = 1./h[1:] + 1./h[:-1]
+    bands[1, :-1] = -1./h[1:-1]
+    rhs = 4*np.pi*w*g.x*rho
+    # u(0) = 0 at the left wall, and u = Q at the right wall, beyond which
+    # the potential is that of a point charge.
+    Q = np.sum(4*np.pi*w*g.x**2*rho)
+    rhs[-1] += Q/h[-1]
+    u = scl.solveh_banded(bands, rhs, lower=True)
+    return u/g.x
@@ -0,0 +1,231 @@
+"""
+Hamiltonians in two and three dimensions.
+
+On a grid of n_x by n_y points the Laplacian is the sum of the second
+derivatives along each axis. With the wavefunction stored as a flat vector,
+psi[i*n_y + j] = psi(x_i, y_j), that is the Kronecker sum
+
+    T = T_x (x) I_y + I_x (x) T_y
+
+of the 1D kinetic operators, and similarly with three terms in 3D. Built
+the notebook way with ``np.diag`` this would be an N x N matrix with
+N = n_x n_y (or n_x n_y n_z) points, which is hopeless: 100^3 points would
+need 8 TB. Here H is either a sparse matrix, with (2p+1) d + 1 entries per
+row, or never formed at all: :meth:`HamiltonianND.matvec` applies each 1D
+operator along its own axis of the grid.
+
+The lowest states are found with iterative eigensolvers
+(:func:`eigensolve_nd`): shift-invert Lanczos on the sparse matrix, or
+LOBPCG, which only needs H.psi and a preconditioner, an approximation to
+(H - E)^-1. For a separable potential V = v_x(x) + v_y(y), H itself is a
+Kronecker sum of 1D Hamiltonians H_d = T_d + v_d, and with
+H_d = Q_d L_d Q_d^T
+
+    (H - s)^-1 = (Q_x (x) Q_y) diag(1/(l_i + l_j - s)) (Q_x (x) Q_y)^T
+
+which costs O(N (n_x + n_y)) to apply and O(n_x^2 + n_y^2) memory. Any
+other potential is replaced by its closest separable approximation (the
+sum of its averages along each axis) for the preconditioner; the closer V
+is to separable, the fewer iterations LOBPCG needs.
+"""
+
+import numpy as np
+
+from .hamiltonian import Hamiltonian, KineticOperator
+
+METHODS = ("auto", "sparse", "lobpcg")
+
+# Above this many points "auto" switches from sparse LU to LOBPCG.
+SPARSE_LIMIT = 200000
+
+
+class HamiltonianND:
+    """
+    The Hamiltonian T + V on a grid with one :class:`KineticOperator` per
+    axis. ``V`` has the shape of the grid, ``(n_x, n_y)`` or
+    ``(n_x, n_y, n_z)``.
+    """
+
+    def __init__(self, kinetics, V):
+        kinetics = list(kinetics)
+        V = np.asarray(V, dtype=float)
+        if V.shape != tuple(k.N for k in kinetics):
+            raise ValueError("V has shape {}, the grid is {}".format(
+                V.shape, tuple(k.N for k in kinetics)))
+        if not all(k.is_banded for k in kinetics):
+            raise ValueError("Numerov's method is not supported in more than one dimension")
+        self.kinetics = kinetics
+        self.V = V
+
+    @property
+    def grid_shape(self):
+        return self.V.shape
+
+    @property
+    def ndim(self):
+        return self.V.ndim
+
+    @property
+    def N(self):
+        """The total number of grid points."""
+        return self.V.size
+
+    @property
+    def shape(self):
+        return (self.N, self.N)
+
+    def with_potential(self, V):
+        """A new Hamiltonian with the same kinetic operators but potential ``V``."""
+        return HamiltonianND(self.kinetics, V)
+
+    def matvec(self, psi):
+        """
+        Compute H.psi without forming H. ``psi`` is a flat vector of length
+        N or a block of shape (N, k).
+        """
+        psi = np.asarray(psi)
+        block = psi.shape[1:]
+        grid = psi.reshape(self.grid_shape + block)
+        out = self.V.reshape(self.grid_shape + (1,)*len(block))*grid
+        for axis, kinetic in enumerate(self.kinetics):
+            # The bands of this axis, shaped to broadcast along it, and
+            # applied to shifted slices of the grid as in _banded_matvec.
+            N = kinetic.N
+            bands = kinetic.bands.reshape(kinetic.bands.shape + (1,)*(grid.ndim - axis - 1))
+            out += bands[0]*grid
+            before = (slice(None),)*axis
+            for j in range(1, bands.shape[0]):
+                lo = before + (slice(None, N-j),)
+                hi = before + (slice(j, None),)
+                b = bands[j, :N-j]
+                out[lo] += b*grid[hi]
+                out[hi] += b*grid[lo]
+        return out.reshape(psi.shape)
+
+    def aslinearoperator(self):
+        """H as a scipy LinearOperator, for the iterative solvers."""
+        from scipy.sparse.linalg import LinearOperator
+        dtype = np.result_type(self.V, *(k.bands for k in self.kinetics))
+        return LinearOperator(self.shape, matvec=self.matvec, matmat=self.matvec, dtype=dtype)
+
+    def to_sparse(self, format="csr"):
+        """H as a scipy.sparse matrix, built as a Kronecker sum."""
+        import scipy.sparse as sps
+        T = None
+        for kinetic in self.kinetics:
+            Td = Hamiltonian(kinetic, np.zeros(kinetic.N)).to_sparse(format)
+            # kronsum(A, B) = I_B (x) A + B (x) I_A, so the earlier axes,
+            # which vary slowest, go on the left of the new one.
+            T = Td if T is None else sps.kronsum(Td, T, format=format)
+        return (T + sps.diags(self.V.ravel())).asformat(format)
+
+    def separable_solver(self, delta=0.5):
+        """
+        A function applying (H_s - s)^-1, for vectors of length N or blocks
+        of shape (N, k), where H_s is H with V replaced by its separable
+        part and s is ``delta`` below the lowest eigenvalue of H_s. This is
+        the LOBPCG preconditioner; for a separable V it is exact.
+        """
+        d = self.ndim
+        mean = self.V.mean()
+        Q, L = [], []
+        for axis, kinetic in enumerate(self.kinetics):
+            others = tuple(a for a in range(d) if a != axis)
+            v = self.V.mean(axis=others) - mean*(d-1)/d
+            l, q = np.linalg.eigh(Hamiltonian(kinetic, v).to_dense())
+            Q.append(q)
+            L.append(l)
+        energies = sum(np.ix_(*L))
+        scale = 1./(energies - energies.min() + delta)
+        shape = self.grid_shape
+
+        def transform(x, matrices):
+            for axis, q in enumerate(matrices):
+                x = np.moveaxis(np.tensordot(q, x, axes=(1, axis)), 0, axis)
+            return x
+
+        def solve(b):
+            b = np.asarray(b)
+            block = b.shape[1:]
+            x = transform(b.reshape(shape + block), [q.T for q in Q])
+            x = x*scale.reshape(shape + (1,)*len(block))
+            return transform(x, Q).reshape(b.shape)
+        return solve
+
+
+def build_hamiltonian_nd(axes, V, hbar=1., m=1., stencil=3):
+    """
+    Build the Hamiltonian on the grid with points ``axes[d]`` along axis d
+    (arrays or :class:`dft.grid.Grid` objects).
+
+    ``V`` is the potential on the grid, shape ``(len(axes[0]), ...)``, or a
+    function of the coordinate arrays, e.g. ``lambda x, y: 0.5*(x*x + y*y)``,
+    which is evaluated on ``np.meshgrid(..., indexing="ij")``. The stencils
+    are those of :func:`dft.hamiltonian.build_hamiltonian`, except Numerov.
+    """
+    kinetics = [KineticOperator.from_grid(x, hbar=hbar, m=m, stencil=stencil) for x in axes]
+    if callable(V):
+        points = [getattr(x, "x", x) for x in axes]
+        V = V(*np.meshgrid(*points, indexing="ij"))
+    return HamiltonianND(kinetics, V)
+
+
+def _initial_guess(H, k):
+    # The lowest k products of 1D box states, which have roughly the right
+    # shape and number of nodes.
+    sines = []
+    for n in H.grid_shape:
+        i = np.arange(1, n+1)
+        sines.append(np.sin(np.pi*np.outer(np.arange(1, k+1), i)/(n+1)))
+    quanta = np.array(np.meshgrid(*[np.arange(1, k+1)]*H.ndim, indexing="ij")).reshape(H.ndim, -1)
+    order = np.argsort(np.sum(quanta**2, axis=0), kind="stable")[:k]
+    X = np.empty((H.N, k))
+    for col, index in enumerate(order):
+        q = quanta[:, index] - 1
+        state = sines[0][q[0]]
+        for d in range(1, H.ndim):
+            state = np.multiply.outer(state, sines[d][q[d]])
+        X[:, col] = state.ravel()/np.linalg.norm(state)
+    return X
+
+
+def eigensolve_nd(H, k=1, method="auto", tol=1e-8, maxiter=500):
+    """
+    The lowest k states of a :class:`HamiltonianND`.
+
+    ``method`` is ``"sparse"`` (shift-invert Lanczos, factorising the sparse
+    matrix), ``"lobpcg"`` (matrix-free, preconditioned with
+    :meth:`HamiltonianND.separable_solver`) or ``"auto"``: sparse for 2D
+    grids up to ``SPARSE_LIMIT`` points, where the LU factors stay small,
+    LOBPCG otherwise.
+
+    Returns the energies and the states, shape (k, N), normalised as in
+    :func:`dft.solvers.eigensolve`; ``psi[n].reshape(H.grid_shape)`` is the
+    n-th state on the grid. Raises ``RuntimeError`` if LOBPCG has not
+    converged to ``tol`` after ``maxiter`` iterations.
+    """
+    from scipy.sparse.linalg import LinearOperator, eigsh, lobpcg
+    if method not in METHODS:
+        raise ValueError("unknown method {!r}, expected one of {}".format(method, METHODS))
+    if method == "auto":
+        method = "sparse" if H.ndim <= 2 and H.N <= SPARSE_LIMIT else "lobpcg"
+    # The kinetic energy is never negative, so nothing lies below min(V).
+    lower = np.min(H.V) - 1.
+    if method == "sparse":
+        E, X = eigsh(H.to_sparse("csc"), k=k, sigma=lower, which="LM")
+    else:
+        solve = H.separable_solver()
+        M = LinearOperator(H.shape, matvec=solve, matmat=solve, dtype=float)
+        # LOBPCG struggles to pull in the last few states of the block, so
+        # a couple of extra ones are carried along.
+        extra = min(2, H.N - k)
+        E, X = lobpcg(H.aslinearoperator(), _initial_guess(H, k+extra), M=M, tol=tol,
+                      maxiter=maxiter, largest=False)
+    order = np.argsort(E)[:k]
+    E, X = E[order], X[:, order]
+    if method == "lobpcg":
+        # LOBPCG only warns when it runs out of iterations.
+        residual = np.linalg.norm(H.matvec(X) - X*E, axis=0)
+        if not np.all(residual < tol*np.maximum(1., np.abs(E))):
+            raise RuntimeError("LOBPCG did not converge in {} iterations".format(maxiter))
+    return E, X.T
@@ -0,0 +1,241 @@
+"""
+Potentials evaluated on a whole grid at once.
+
+The notebooks fill the potential point by point,
+
+    V=np.zeros(N)
+    for i in range(N):
+        if x[i]> -b/2. and x[i]< b/2.:
+            V[i]= V0
+
+which is slow for large N and has to be repeated for every set of
+parameters. The potentials here are small objects holding their parameters;
+calling one with an array of points returns V for all of them using NumPy
+masks, so the same well is simply ``FiniteWell(V0=-6., b=2.)(x)``.
+
+Potentials can be added together and scaled, and :meth:`Potential.replace`
+gives a copy with some parameters changed, which is what a sweep over the
+well separation needs:
+
+    V = DoubleWell(V0=-6., w=2., b=1.)
+    for b in b_vals:
+        Vb = V.replace(b=b)(x)
+"""
+
+import dataclasses
+from dataclasses import dataclass
+
+import numpy as np
+
+
+class Potential:
+    """Base class for the potentials. Subclasses implement :meth:`__call__`."""
+
+    def __call__(self, x):
+        raise NotImplementedError
+
+    def replace(self, **params):
+        """A copy of this potential with some of its parameters changed."""
+        return dataclasses.replace(self, **params)
+
+    def parameters(self):
+        """The parameters of this potential as a dictionary."""
+        return dataclasses.asdict(self)
+
+    def _names(self):
+        # The parameter names that replace() accepts.
+        return {f.name for f in dataclasses.fields(self)}
+
+    def __add__(self, other):
+        if isinstance(other, (int, float)):
+            other = Constant(float(other))
+        if not isinstance(other, Potential):
+            return NotImplemented
+        return Sum(_terms(self) + _terms(other))
+
+    def __radd__(self, other):
+        # Makes sum([V1, V2, ...]) work, since sum() starts from 0.
+        return self.__add__(other)
+
+    def __mul__(self, factor):
+        if not isinstance(factor, (int, float)):
+            return NotImplemented
+        return Scaled(self, float(factor))
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Scaled(self, -1.)
+
+
+def _terms(V):
+    return V.terms if isinstance(V, Sum) else (V,)
+
+
+@dataclass(frozen=True)
+class Constant(Potential):
+    """A constant potential V0 everywhere."""
+    V0: float = 0.
+
+    def __call__(self, x):
+        return np.full(np.shape(x), self.V0, dtype=float)
+
+
+@dataclass(frozen=True)
+class InfiniteWell(Potential):
+    """
+    An infinite square well of width ``a``: zero inside and ``wall`` outside.
+
+    The notebooks get the infinite well by making the grid itself the box
+    (``V=0`` everywhere, with the wavefunction forced to zero at the edges),
+    which is more accurate. This potential is for putting a box inside a
+    larger grid; ``wall`` needs to be large compared to the energies of
+    interest, but not so large that it spoils the precision of the solver.
+    """
+    a: float = 1.
+    center: float = 0.
+    wall: float = 1e6
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=float)
+        return np.where(np.abs(x-self.center) <= self.a/2., 0., self.wall)
+
+
+@dataclass(frozen=True)
+class FiniteWell(Potential):
+    """A square well of depth ``V0`` (negative for a well) and width ``b``."""
+    V0: float = -6.
+    b: float = 2.
+    center: float = 0.
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=float)
+        inside = (x > self.center-self.b/2.) & (x < self.center+self.b/2.)
+        return np.where(inside, self.V0, 0.)
+
+
+@dataclass(frozen=True)
+class DoubleWell(Potential):
+    """
+    Two square wells of depth ``V0`` and width ``w``, separated by a barrier
+    of width ``b`` centred on ``center``.
+    """
+    V0: float = -6.
+    w: float = 2.
+    b: float = 1.
+    center: float = 0.
+
+    def __call__(self, x):
+        d = np.abs(np.asarray(x, dtype=float) - self.center)
+        inside = (d > self.b/2.) & (d < self.b/2.+self.w)
+        return np.where(inside, self.V0, 0.)
+
+
+@dataclass(frozen=True)
+class Harmonic(Potential):
+    """The harmonic oscillator potential 1/2 m omega^2 (x-center)^2."""
+    omega: float = 1.
+    m: float = 1.
+    center: float = 0.
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=float)
+        return 0.5*self.m*self.omega**2*(x-self.center)**2
+
+
+@dataclass(frozen=True)
+class Coulomb(Potential):
+    """
+    The Coulomb potential -Z/|x-center| of a nucleus of charge Z, in Hartree
+    units.
+
+    With ``soft > 0`` this is the softened form -Z/sqrt((x-center)^2 + soft^2)
+    commonly used for 1D model atoms, which stays finite at the nucleus. With
+    ``soft = 0`` a grid point sitting on the nucleus gets -inf.
+    """
+    Z: float = 1.
+    soft: float = 0.
+    center: float = 0.
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=float)
+        r = np.sqrt((x-self.center)**2 + self.soft**2)
+        with np.errstate(divide="ignore"):
+            return -self.Z/r
+
+
+@dataclass(frozen=True)
+class Piecewise(Potential):
+    """
+    A piecewise constant potential.
+
+    ``values[i]`` applies for ``edges[i] <= x < edges[i+1]``, so there is one
+    more edge than there are values. Outside the edges the potential is
+    ``outside``.
+    """
+    edges: tuple = (-1., 1.)
+    values: tuple = (-6.,)
+    outside: float = 0.
+
+    def __post_init__(self):
+        # Store tuples so that the potential stays hashable.
+        object.__setattr__(self, "edges", tuple(float(e) for e in self.edges))
+        object.__setattr__(self, "values", tuple(float(v) for v in self.values))
+        if len(self.edges) != len(self.values)+1:
+            raise ValueError("Piecewise needs one more edge than values, got {} edges and {} values"
+                             .format(len(self.edges), len(self.values)))
+        if np.any(np.diff(self.edges) < 0):
+            raise ValueError("Piecewise edges must be in increasing order")
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=float)
+        i = np.searchsorted(self.edges, x, side="right") - 1
+        inside = (i >= 0) & (i < len(self.values))
+        values = np.array(self.values)
+        return np.where(inside, values[np.clip(i, 0, len(values)-1)], self.outside)
+
+
+@dataclass(frozen=True)
+class Sum(Potential):
+    """The sum of several potentials, as made by ``V1 + V2``."""
+    terms: tuple = ()
+
+    def __call__(self, x):
+        V = np.zeros(np.shape(x))
+        for term in self.terms:
+            V += term(x)
+        return V
+
+    def replace(self, **params):
+        """Change the given parameters in every term that has them."""
+        unused = set(params)
+        terms = []
+        for term in self.terms:
+            mine = {p: v for p, v in params.items() if p in term._names()}
+            unused -= set(mine)
+            terms.append(term.replace(**mine) if mine else term)
+        if unused:
+            raise TypeError("no term has the parameter(s) {}".format(sorted(unused)))
+        return Sum(tuple(terms))
+
+    def _names(self):
+        return set().union(*(term._names() for term in self.terms))
+
+
+@dataclass(frozen=True)
+class Scaled(Potential):
+    """A potential multiplied by a constant factor."""
+    potential: Potential = Constant()
+    factor: float = 1.
+
+    def __call__(self, x):
+        return self.factor*self.potential(x)
+
+    def replace(self, **params):
+        if "factor" in params:
+            factor = params.pop("factor")
+            return Scaled(self.potential.replace(**params) if params else self.potential, factor)
+        return Scaled(self.potential.replace(**params), self.factor)
+
+    def _names(self):
+        return {"factor"} | self.potential._names()
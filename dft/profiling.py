@@ -0,0 +1,246 @@
+"""
+Timing and memory of each stage of a calculation.
+
+When a run is slow the question is where the time goes: setting up the
+grid, evaluating the potential, building H, the eigensolver, the analysis
+of the states or saving the results. The package marks each of these
+stages with
+
+    with profiling.stage("eigensolve"):
+        ...
+
+which does nothing unless profiling has been switched on, by calling
+:func:`enable` or by setting the environment variable ``DFT_PROFILE=1``
+(which also reaches worker processes). Switched off, a stage costs one
+function call. Switched on, each stage records its wall time, its peak
+memory (from ``tracemalloc``, which slows allocation down, so it can be
+left out with ``enable(memory=False)``) and the number of BLAS threads,
+which is looked up once, when profiling is switched on.
+Stages can be nested; a stage inside another is reported under the path
+``outer/inner``.
+
+    from dft import profiling
+    profiling.enable()
+    run_sweep(...)
+    print(profiling.format_report())
+    profiling.save_report("profile.json")
+
+Work done in the worker processes of a sweep is recorded there and sent
+back with the results (see :func:`submit`).
+
+The BLAS thread count comes from ``threadpoolctl`` if it is installed,
+otherwise from the usual environment variables, and is None if neither
+says.
+"""
+
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import Future
+
+import numpy as np
+
+_enabled = False
+_memory = True
+_blas_threads = None
+_records = []
+_stack = []
+_lock = threading.Lock()
+
+BLAS_VARIABLES = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def enable(memory=True):
+    """Start recording stages, with their peak memory unless ``memory=False``."""
+    global _enabled, _memory, _blas_threads
+    _enabled = True
+    _memory = memory
+    # threadpool_info() inspects every loaded library, far too slow to call
+    # at the end of every stage.
+    _blas_threads = blas_threads()
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    """Stop recording stages. What was recorded is kept until :func:`reset`."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """Forget everything recorded so far."""
+    with _lock:
+        del _records[:]
+
+
+def records():
+    """A copy of the raw records, one dict per stage run."""
+    with _lock:
+        return list(_records)
+
+
+def blas_threads():
+    """The number of threads BLAS will use, or None if it cannot be found."""
+    try:
+        from threadpoolctl import threadpool_info
+    except ImportError:
+        for name in BLAS_VARIABLES:
+            if os.environ.get(name, "").isdigit():
+                return int(os.environ[name])
+        return None
+    counts = [p["num_threads"] for p in threadpool_info() if p.get("user_api") == "blas"]
+    return max(counts) if counts else None
+
+
+class _NullStage:
+    # What stage() returns when profiling is off.
+    wall = memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullStage()
+
+
+class Stage:
+    """
+    One run of a stage. After it ends, ``wall`` is its wall time in seconds
+    and ``memory`` its peak memory in bytes (None if not traced).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.wall = None
+        self.memory = None
+        self._peak = 0
+
+    def __enter__(self):
+        if _memory and tracemalloc.is_tracing():
+            # The peak so far belongs to the enclosing stage; start afresh.
+            if _stack:
+                _stack[-1]._peak = max(_stack[-1]._peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self.path = "/".join([s.name for s in _stack] + [self.name])
+        _stack.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self._start
+        _stack.pop()
+        if _memory and tracemalloc.is_tracing():
+            self.memory = max(self._peak, tracemalloc.get_traced_memory()[1])
+            if _stack:
+                _stack[-1]._peak = max(_stack[-1]._peak, self.memory)
+        record = {"stage": self.path, "wall": self.wall, "memory": self.memory,
+                  "blas_threads": _blas_threads, "pid": os.getpid()}
+        with _lock:
+            _records.append(record)
+        return False
+
+
+def stage(name):
+    """A context manager timing the stage ``name``; free when profiling is off."""
+    if not _enabled:
+        return _NULL
+    return Stage(name)
+
+
+def _profiled(memory, fn, *args):
+    # Run fn in a worker process with profiling on, and send back what it
+    # recorded along with its result.
+    enable(memory)
+    reset()
+    with stage(getattr(fn, "__name__", "task").lstrip("_")):
+        out = fn(*args)
+    return out, records()
+
+
+def submit(pool, fn, *args):
+    """
+    ``pool.submit(fn, *args)``, but if profiling is on the stages run in
+    the worker are recorded there and added to this process's records when
+    the task finishes. The returned future gives the result of ``fn`` as
+    usual.
+    """
+    if not _enabled:
+        return pool.submit(fn, *args)
+    inner = pool.submit(_profiled, _memory, fn, *args)
+    outer = Future()
+
+    def done(f):
+        try:
+            out, recorded = f.result()
+        except BaseException as e:
+            outer.set_exception(e)
+            return
+        with _lock:
+            _records.extend(recorded)
+        outer.set_result(out)
+    inner.add_done_callback(done)
+    return outer
+
+
+def report():
+    """
+    The records summed up per stage, as a dict ready for JSON: the number
+    of calls, total, mean and longest wall time, the largest peak memory
+    and the BLAS threads seen, in the order the stages first ran.
+    """
+    stages = {}
+    for r in records():
+        s = stages.setdefault(r["stage"], {"stage": r["stage"], "calls": 0, "total": 0.,
+                                           "max": 0., "memory": None, "blas_threads": set(),
+                                           "processes": set()})
+        s["calls"] += 1
+        s["total"] += r["wall"]
+        s["max"] = max(s["max"], r["wall"])
+        if r["memory"] is not None:
+            s["memory"] = max(s["memory"] or 0, r["memory"])
+        s["blas_threads"].add(r["blas_threads"])
+        s["processes"].add(r["pid"])
+    for s in stages.values():
+        s["mean"] = s["total"]/s["calls"]
+        s["blas_threads"] = sorted(t for t in s["blas_threads"] if t is not None) or None
+        s["processes"] = len(s["processes"])
+    meta = {"python": sys.version.split()[0], "numpy": np.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    return {"meta": meta, "stages": list(stages.values())}
+
+
+def format_report(rep=None):
+    """A report (by default the current one) as a text table."""
+    rep = report() if rep is None else rep
+    lines = ["{:<40} {:>7} {:>11} {:>11} {:>11} {:>10} {:>5}".format(
+        "stage", "calls", "total s", "mean s", "max s", "peak MB", "blas")]
+    for s in rep["stages"]:
+        memory = "-" if s["memory"] is None else "{:.2f}".format(s["memory"]/1e6)
+        blas = "-" if not s["blas_threads"] else ",".join(str(t) for t in s["blas_threads"])
+        lines.append("{:<40} {:>7} {:>11.4f} {:>11.6f} {:>11.6f} {:>10} {:>5}".format(
+            s["stage"], s["calls"], s["total"], s["mean"], s["max"], memory, blas))
+    return "\n".join(lines)
+
+
+def save_report(path, rep=None):
+    """Write a report (by default the current one) to a JSON file."""
+    rep = report() if rep is None else rep
+    with open(path, "w") as f:
+        json.dump(rep, f, indent=1)
+
+
+if os.environ.get("DFT_PROFILE", "") not in ("", "0"):
+    enable()
@@ -0,0 +1,82 @@
+"""
+Atoms with a spherically symmetric potential, solved along the radius.
+
+For a potential V(r) the wavefunction separates as
+psi = R(r) Y_lm(theta, phi) (see ``Hydrogen.md``), and u(r) = r R(r)
+satisfies a 1D Schrödinger equation for each angular momentum l,
+
+    -hbar^2/2m u'' + (V(r) + hbar^2 l(l+1)/(2 m r^2)) u = E u,    u(0) = 0
+
+so an atom costs a handful of 1D solves instead of one 3D one. The
+wavefunction changes quickly near the nucleus and slowly far away, so the
+points are spaced logarithmically (:meth:`dft.grid.Grid.log`). Very small
+``rmin`` makes the Hamiltonian badly conditioned (the kinetic term grows
+like 1/rmin^2); around 1e-4/Z is a good choice.
+
+Each l is independent, so the channels are solved in parallel.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+from .grid import Grid
+from .hamiltonian import build_hamiltonian
+from .solvers import eigensolve
+
+
+def radial_grid(Z=1., N=2000, rmin=None, rmax=80.):
+    """A logarithmic radial grid for a nucleus of charge Z."""
+    return Grid.log(1e-4/Z if rmin is None else rmin, rmax, N)
+
+
+def radial_hamiltonian(grid, V, l=0, hbar=1., m=1.):
+    """The Hamiltonian for u(r) = r R(r) in the channel l, on a radial grid."""
+    r = grid.x
+    return build_hamiltonian(grid, V + hbar*hbar*l*(l+1)/(2.*m*r*r), hbar=hbar, m=m)
+
+
+def solve_channel(potential, grid, l, k=3, hbar=1., m=1., method="auto"):
+    """
+    The lowest k states of the channel l.
+
+    Returns the energies and the eigenvectors, shape (k, N); use
+    ``grid.wavefunction(psi)`` to get u(r), normalised so that the integral
+    of u^2 dr is 1.
+    """
+    V = potential(grid.x) if callable(potential) else potential
+    return eigensolve(radial_hamiltonian(grid, V, l, hbar, m), k=k, method=method)
+
+
+def solve_atom(potential, grid=None, lmax=2, k=3, processes=None, hbar=1., m=1., method="auto"):
+    """
+    Solve the channels l = 0, ..., lmax of a spherically symmetric potential.
+
+    Parameters
+    ----------
+    potential : callable or array
+        V(r), e.g. ``Coulomb(Z=1.)``, or its values on the grid.
+    grid : Grid, optional
+        The radial grid; the default is :func:`radial_grid` for the charge
+        ``potential.Z`` if the potential has one (as
+        :class:`dft.potentials.Coulomb` does), and for Z = 1 otherwise.
+    lmax : int
+        Largest angular momentum.
+    k : int
+        Number of states per channel.
+    processes : int, optional
+        Number of worker processes; ``None`` uses one per CPU, and 1 solves
+        the channels one after the other, which is quicker when each solve
+        only takes milliseconds.
+
+    Returns
+    -------
+    dict
+        ``{l: (E, psi)}`` for each l.
+    """
+    grid = radial_grid(getattr(potential, "Z", 1.)) if grid is None else grid
+    ls = range(lmax+1)
+    args = (k, hbar, m, method)
+    if processes == 1:
+        return {l: solve_channel(potential, grid, l, *args) for l in ls}
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {l: pool.submit(solve_channel, potential, grid, l, *args) for l in ls}
+        return {l: futures[l].result() for l in ls}
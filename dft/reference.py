@@ -0,0 +1,138 @@
+"""
+Analytic reference energies to check the numerical solutions against.
+
+For the infinite square well of width a,
+
+    E_n = n^2 pi^2 hbar^2 / (2 m a^2)
+
+For a finite square well of depth V0 and width b, write z = k b/2 with
+k = sqrt(2m(E - V0))/hbar and z0 = (b/2) sqrt(2m|V0|)/hbar. The bound states
+are the solutions of
+
+    z tan z = sqrt(z0^2 - z^2)     (even states)
+    -z cot z = sqrt(z0^2 - z^2)    (odd states)
+
+with 0 < z < z0, and E = V0 + (hbar k)^2/2m.
+
+For two such wells of width w separated by a barrier of width b there is no
+neat form like this, but matching the wavefunction in each region still
+gives one equation in E, which we solve numerically.
+
+For a hydrogen-like atom of nuclear charge Z, in Hartree units,
+
+    E_n = -Z^2/(2 n^2)
+
+which is the -13.6/n^2 eV of ``Hydrogen.md`` for Z = 1, since one Hartree
+is 27.211 eV.
+"""
+
+import numpy as np
+import scipy.optimize as opt
+
+# One Hartree in electron volts.
+HARTREE = 27.211386245988
+
+
+def infinite_well_energies(a, n=5, hbar=1., m=1.):
+    """The lowest n energies of an infinite square well of width a."""
+    n = np.arange(1, n+1)
+    return n*n*np.pi**2*hbar*hbar/(2*m*a*a)
+
+
+def hydrogen_energies(n=5, Z=1., m=1.):
+    """The energies of the levels n = 1, ..., n of a hydrogen-like atom."""
+    n = np.arange(1, n+1)
+    return -m*Z*Z/(2.*n*n)
+
+
+def finite_well_roots(z0, n=None, tol=1e-12, maxiter=100):
+    """
+    The roots z of the finite well equations for an array of ``z0``.
+
+    Writing z = z0 sin(t), so that sqrt(z0^2 - z^2) = z0 cos(t), the even
+    condition becomes cos(z + t) = 0 and the odd one sin(z + t) = 0. Both
+    are covered by
+
+        z0 sin(t) + t = (j + 1) pi/2,    0 < t < pi/2
+
+    whose left hand side is increasing and concave in t, and state j
+    (even for even j, odd for odd j) is its only root. It exists when
+    z0 > j pi/2. Newton's method started from t = 0 approaches that root
+    from below without ever overshooting it, so all the roots for all the
+    z0 are found together, with no brackets to keep track of. Convergence
+    is quadratic, so stopping once every step is below ``tol`` leaves the
+    roots accurate to rounding error.
+
+    Returns an array of shape ``z0.shape + (n,)``, ``z[..., j]`` the root of
+    state j, NaN where the well has fewer than j + 1 bound states. ``n``
+    defaults to the number of states of the deepest well.
+    """
+    z0 = np.asarray(z0, dtype=float)
+    if n is None:
+        n = int(np.ceil(2.*z0/np.pi).max(initial=0))
+    target = (np.arange(n) + 1.)*np.pi/2.
+    z0 = z0[..., None]
+    bound = z0 > target - np.pi/2.
+    t = np.zeros(np.broadcast(z0, target).shape)
+    for it in range(maxiter):
+        step = (target - z0*np.sin(t) - t)/(z0*np.cos(t) + 1.)
+        t = np.minimum(t + step, np.pi/2.)
+        if np.all(np.abs(step[bound]) <= tol):
+            break
+    return np.where(bound, z0*np.sin(t), np.nan)
+
+
+def finite_well_table(V0, b, n=None, hbar=1., m=1.):
+    """
+    The bound state energies of many finite square wells at once.
+
+    ``V0`` (< 0) and ``b`` are arrays (or numbers) that broadcast together,
+    such as the depths and widths of the points of a sweep. Returns an array
+    of shape ``broadcast(V0, b).shape + (n,)`` with the energies of each
+    well in increasing order, NaN past its last bound state; see
+    :func:`finite_well_roots`.
+    """
+    V0, b = np.broadcast_arrays(np.asarray(V0, dtype=float), np.asarray(b, dtype=float))
+    z0 = b/2.*np.sqrt(2*m*np.abs(V0))/hbar
+    z = finite_well_roots(z0, n)
+    k = 2.*z/b[..., None]
+    return V0[..., None] + (hbar*k)**2/(2*m)
+
+
+def finite_well_energies(V0, b, hbar=1., m=1.):
+    """
+    All bound state energies of a finite square well of depth ``V0`` (< 0)
+    and width ``b``, in increasing order.
+    """
+    return finite_well_table(V0, b, hbar=hbar, m=m)
+
+
+def _double_well_match(E, V0, w, b, parity, hbar, m):
+    # Start from the symmetric (cosh) or antisymmetric (sinh) solution in the
+    # barrier, carry it across the well as cos/sin and measure how far it is
+    # from the decaying exponential outside. Zero at an eigenvalue. The
+    # barrier solution is divided by cosh to avoid overflow.
+    kappa = np.sqrt(-2*m*E)/hbar
+    k = np.sqrt(2*m*(E - V0))/hbar
+    t = np.tanh(kappa*b/2.)
+    if parity == 0:
+        psi, dpsi = 1., kappa*t
+    else:
+        psi, dpsi = t, kappa
+    return (dpsi + kappa*psi)*np.cos(k*w) + (kappa*dpsi/k - k*psi)*np.sin(k*w)
+
+
+def double_well_energies(V0, w, b, hbar=1., m=1., samples=4000):
+    """
+    All bound state energies of two square wells of depth ``V0`` (< 0) and
+    width ``w`` separated by a barrier of width ``b`` (see
+    :class:`dft.potentials.DoubleWell`), in increasing order.
+    """
+    E = np.linspace(V0, 0., samples+2)[1:-1]
+    roots = []
+    for parity in (0, 1):
+        f = _double_well_match(E, V0, w, b, parity, hbar, m)
+        for i in np.flatnonzero(np.sign(f[:-1]) != np.sign(f[1:])):
+            roots.append(opt.brentq(_double_well_match, E[i], E[i+1],
+                                    args=(V0, w, b, parity, hbar, m)))
+    return np.sort(roots)
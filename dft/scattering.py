@@ -0,0 +1,180 @@
+"""
+Scattering states: transmission and reflection by the transfer matrix method.
+
+The finite well notebooks warn that the states with E > 0 found by ``eigh``
+are not reliable: in a box every state is a standing wave, and the box
+decides the energies, not the well. A particle coming in from the left
+is instead described by
+
+    psi = exp(i k_L x) + r exp(-i k_L x)    (left of the potential)
+    psi = t exp(i k_R x)                    (right of it)
+
+and the transmission and reflection probabilities are
+
+    T = (k_R/k_L) |t|^2,    R = |r|^2
+
+Split the potential into slabs of constant V_j. Within a slab psi is a sum
+of exp(+-i k_j x), with k_j = sqrt(2m(E - V_j))/hbar (imaginary where
+E < V_j), and (psi, psi') at the two sides of the slab are related by
+
+    [ cos(k d)       sin(k d)/k ]
+    [ -k sin(k d)    cos(k d)   ]
+
+for a slab of width d. Multiplying these matrices across the potential
+costs O(N) per energy, and each step is done for all the energies at once,
+so a whole spectrum of thousands of energies takes N array operations.
+Square wells and barriers (:class:`dft.potentials.FiniteWell`,
+:class:`dft.potentials.DoubleWell`, :class:`dft.potentials.Piecewise`) are
+split at their edges, which is exact; any other potential is sampled at the
+midpoints of the slabs between the points ``x``.
+
+Resonances, the quasi-bound states of a double well or double barrier,
+show up as sharp peaks of T(E), with a width Gamma that gives their
+lifetime hbar/Gamma. :func:`resonances` finds them.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .potentials import Constant, DoubleWell, FiniteWell, Piecewise, Scaled, Sum
+
+
+def potential_edges(potential):
+    """
+    The points where a piecewise constant potential jumps, in order (none
+    for a :class:`dft.potentials.Constant`), or None if ``potential`` is not
+    piecewise constant.
+    """
+    if isinstance(potential, Constant):
+        return np.empty(0)
+    if isinstance(potential, FiniteWell):
+        c, b = potential.center, potential.b
+        return np.array([c - b/2., c + b/2.])
+    if isinstance(potential, DoubleWell):
+        c, b, w = potential.center, potential.b, potential.w
+        return np.array([c - b/2. - w, c - b/2., c + b/2., c + b/2. + w])
+    if isinstance(potential, Piecewise):
+        return np.array(potential.edges)
+    if isinstance(potential, Scaled):
+        return potential_edges(potential.potential)
+    if isinstance(potential, Sum):
+        edges = [potential_edges(term) for term in potential.terms]
+        if any(e is None for e in edges):
+            return None
+        return np.unique(np.concatenate(edges))
+    return None
+
+
+def _amplitudes(E, edges, V, V_left, V_right, hbar, m):
+    # The transmitted and reflected amplitudes t and r for every energy.
+    E = np.asarray(E, dtype=float)
+    c = 2.*m/(hbar*hbar)
+    M11, M12 = np.ones_like(E, dtype=complex), np.zeros_like(E, dtype=complex)
+    M21, M22 = np.zeros_like(E, dtype=complex), np.ones_like(E, dtype=complex)
+    for d, Vj in zip(np.diff(edges), V):
+        k = np.sqrt(c*(E - Vj) + 0j)
+        cos = np.cos(k*d)
+        # sin(k d)/k, which tends to d as k -> 0.
+        sin_k = d*np.sinc(k*d/np.pi)
+        ksin = -k*k*sin_k
+        M11, M12, M21, M22 = (cos*M11 + sin_k*M21, cos*M12 + sin_k*M22,
+                              ksin*M11 + cos*M21, ksin*M12 + cos*M22)
+    kL = np.sqrt(c*(E - V_left) + 0j)
+    kR = np.sqrt(c*(E - V_right) + 0j)
+    # (t, i kR t) = M (1 + r, i kL (1 - r)), solved for r and t.
+    a, b = M11 + 1j*kL*M12, M11 - 1j*kL*M12
+    g, h = M21 + 1j*kL*M22, M21 - 1j*kL*M22
+    r = (g - 1j*kR*a)/(1j*kR*b - h)
+    t = a + b*r
+    return t, r, kL, kR
+
+
+def _probabilities(E, edges, V, V_left, V_right, hbar, m):
+    t, r, kL, kR = _amplitudes(E, edges, V, V_left, V_right, hbar, m)
+    # Nothing comes in or gets through below the potential at either end.
+    open_ = (kL.real > 0) & (kR.real > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        T = np.where(open_, kR.real/kL.real*np.abs(t)**2, 0.)
+    R = np.where(open_, np.abs(r)**2, 1.)
+    return T, R
+
+
+def transmission(potential, E, x=None, hbar=1., m=1., processes=1):
+    """
+    The transmission and reflection probabilities T(E) and R(E).
+
+    Parameters
+    ----------
+    potential : Potential or callable
+        V(x). It is constant beyond the ends of the slabs, at its values
+        just outside them.
+    E : array
+        The energies.
+    x : array, optional
+        The slab boundaries. Not needed for the square potentials, which are
+        split exactly at their edges.
+    processes : int
+        Split the energies between this many worker processes; ``None``
+        uses one per CPU. The default, 1, is usually enough, since every
+        energy is done at once anyway.
+
+    Returns
+    -------
+    T, R : arrays like E
+        T + R = 1 wherever the particle can travel on both sides.
+    """
+    if x is None:
+        x = potential_edges(potential)
+        if x is None:
+            raise ValueError("give the slab boundaries x for this potential")
+    edges = np.asarray(x, dtype=float)
+    if len(edges) == 0:
+        # A constant potential; any point splits it into its two sides.
+        edges = np.zeros(1)
+    V = potential(0.5*(edges[1:] + edges[:-1]))
+    step = max(np.ptp(edges), 1.)
+    V_left, V_right = potential(np.array([edges[0] - step, edges[-1] + step]))
+    E = np.asarray(E, dtype=float)
+    args = (edges, V, V_left, V_right, hbar, m)
+    if processes == 1:
+        return _probabilities(E, *args)
+    chunks = np.array_split(E.ravel(), processes or os.cpu_count())
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(_probabilities, chunk, *args) for chunk in chunks]
+        results = [f.result() for f in futures]
+    T = np.concatenate([T for T, _ in results]).reshape(E.shape)
+    R = np.concatenate([R for _, R in results]).reshape(E.shape)
+    return T, R
+
+
+def resonances(E, T, prominence=0.05):
+    """
+    The resonances in a transmission spectrum ``T`` on the increasing
+    energies ``E``.
+
+    Returns the energies of the peaks, refined by fitting a parabola
+    through the three highest points, their full widths at half maximum
+    Gamma (so the quasi-bound states live for about hbar/Gamma), and the
+    peak transmissions. Peaks less than ``prominence`` above their
+    surroundings are ignored. ``E`` needs to be fine enough to resolve the
+    narrowest resonance.
+    """
+    from scipy.signal import find_peaks, peak_widths
+    E = np.asarray(E, dtype=float)
+    T = np.asarray(T, dtype=float)
+    peaks, _ = find_peaks(T, prominence=prominence)
+    peaks = peaks[(peaks > 0) & (peaks < len(E)-1)]
+    _, _, left, right = peak_widths(T, peaks, rel_height=0.5)
+    index = np.arange(len(E))
+    gamma = np.interp(right, index, E) - np.interp(left, index, E)
+    # The vertex of the parabola through the peak and its neighbours.
+    e0, e1, e2 = E[peaks-1], E[peaks], E[peaks+1]
+    t0, t1, t2 = T[peaks-1], T[peaks], T[peaks+1]
+    num = (e1-e0)**2*(t1-t2) - (e1-e2)**2*(t1-t0)
+    den = (e1-e0)*(t1-t2) - (e1-e2)*(t1-t0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vertex = e1 - 0.5*num/den
+    energies = np.where((den != 0) & (vertex > e0) & (vertex < e2), vertex, e1)
+    return energies, gamma, T[peaks]
@@ -0,0 +1,225 @@
+"""
+The self-consistent field (SCF) loop for the Kohn-Sham equations.
+
+Following ``Equations.md``, the electrons move in the effective potential
+
+    V = V_N + V_H[rho] + V_xc[rho]
+
+which depends on the density rho = sum_n f_n |phi_n|^2 of the orbitals it
+produces. Starting from a guess for rho we build V, solve for the occupied
+orbitals, compute the new density, and repeat until the density going in and
+the density coming out agree.
+
+Feeding the output density straight back in usually oscillates, so the next
+input is a mix of the two. Linear mixing, rho_in + alpha (rho_out - rho_in),
+needs a small alpha and hundreds of iterations. Pulay mixing (also called
+DIIS; with a history of two it is Anderson mixing) keeps the last few
+densities and residuals R = rho_out - rho_in and combines them so that the
+residual is as small as possible, which typically converges in tens.
+
+Only the potential changes between iterations, so the kinetic part of the
+Hamiltonian is built once and only the diagonal is replaced.
+"""
+
+import time
+
+import numpy as np
+
+from .grid import Grid
+from .hamiltonian import build_hamiltonian
+from .hartree import hartree
+from .solvers import eigensolve
+from .xc import slater_exchange
+
+MIXERS = ("linear", "anderson", "pulay")
+
+
+def occupations(n_electrons):
+    """
+    The occupation f_n of each orbital: 2 for every full orbital, and 1 for
+    the last one if the number of electrons is odd.
+    """
+    f = [2.]*(n_electrons//2)
+    if n_electrons % 2:
+        f.append(1.)
+    return np.array(f)
+
+
+class LinearMixer:
+    """rho_next = rho_in + alpha (rho_out - rho_in)."""
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+
+    def __call__(self, rho_in, rho_out):
+        return rho_in + self.alpha*(rho_out - rho_in)
+
+
+class PulayMixer:
+    """
+    Pulay (DIIS) mixing over the last ``history`` iterations.
+
+    The input densities rho_i and residuals R_i are combined with
+    coefficients c_i, sum c_i = 1, chosen to minimise |sum c_i R_i|, and the
+    next density is sum c_i (rho_i + alpha R_i). ``weights`` are the grid
+    weights used in the inner product.
+    """
+
+    def __init__(self, alpha=0.5, history=5, weights=1.):
+        self.alpha = alpha
+        self.history = history
+        self.weights = weights
+        self._rho = []
+        self._residual = []
+
+    def __call__(self, rho_in, rho_out):
+        self._rho.append(rho_in)
+        self._residual.append(rho_out - rho_in)
+        del self._rho[:-self.history], self._residual[:-self.history]
+        R = np.array(self._residual)
+        n = len(R)
+        A = np.ones((n+1, n+1))
+        A[:n, :n] = (R*self.weights) @ R.T
+        A[n, n] = 0.
+        b = np.zeros(n+1)
+        b[n] = 1.
+        # lstsq, as the residuals become nearly parallel close to convergence.
+        c = np.linalg.lstsq(A, b, rcond=None)[0][:n]
+        return c @ (np.array(self._rho) + self.alpha*R)
+
+
+class SCFResult:
+    """
+    The outcome of :func:`scf`.
+
+    Attributes
+    ----------
+    energies : array
+        The orbital energies of the occupied orbitals.
+    psi : array, shape (k, N)
+        The occupied orbitals, as returned by :func:`dft.solvers.eigensolve`.
+    occupations : array
+    rho : array
+        The self-consistent density.
+    V_H, V_xc, V : array
+        The Hartree, exchange-correlation and total effective potentials.
+    total_energy : float
+    converged : bool
+    history : list of dict
+        One entry per iteration with ``residual`` (the integral of
+        |rho_out - rho_in|), ``total_energy`` and the time in seconds spent
+        on each stage: ``hartree``, ``xc``, ``solve`` and ``mix``.
+    """
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    @property
+    def iterations(self):
+        return len(self.history)
+
+    def report(self):
+        """A table of the iterations, as a string."""
+        lines = ["{:>5} {:>12} {:>18} {:>9} {:>9} {:>9} {:>9}".format(
+            "iter", "residual", "total energy", "hartree", "xc", "solve", "mix")]
+        for i, h in enumerate(self.history, 1):
+            lines.append("{:>5d} {:>12.4e} {:>18.10f} {:>9.4f} {:>9.4f} {:>9.4f} {:>9.4f}".format(
+                i, h["residual"], h["total_energy"], h["hartree"], h["xc"], h["solve"], h["mix"]))
+        lines.append("converged: {} after {} iterations".format(self.converged, self.iterations))
+        return "\n".join(lines)
+
+
+def scf(x, V_ext, n_electrons, soft=1., xc=slater_exchange, mixing="pulay", alpha=0.5,
+        history=5, tol=1e-8, maxiter=200, rho0=None, hbar=1., m=1., stencil=3,
+        method="auto", verbose=False):
+    """
+    Solve the Kohn-Sham equations self-consistently.
+
+    Parameters
+    ----------
+    x : array or Grid
+        The grid.
+    V_ext : array or callable
+        The external (nuclear) potential on the grid, or a
+        :class:`dft.potentials.Potential` to evaluate on it.
+    n_electrons : int
+        The number of electrons; see :func:`occupations`.
+    soft : float
+        Softening length of the 1D Hartree kernel, see :mod:`dft.hartree`.
+    xc : callable
+        ``xc(rho)`` returns ``(eps_xc, V_xc)``, see :mod:`dft.xc`. Use
+        ``None`` to leave out exchange and correlation (Hartree only).
+    mixing : str or callable
+        ``"linear"``, ``"anderson"``, ``"pulay"``, or a function
+        ``mixing(rho_in, rho_out)`` returning the next input density.
+    alpha, history : float, int
+        Mixing fraction and the number of iterations Pulay mixing remembers.
+    tol : float
+        Stop when the integral of |rho_out - rho_in| is below this.
+    rho0 : array, optional
+        Initial density. The default is the density of the orbitals of
+        ``V_ext`` alone.
+    verbose : bool
+        Print a line per iteration.
+
+    Returns
+    -------
+    SCFResult
+    """
+    g = x if isinstance(x, Grid) else Grid(x)
+    V_ext = V_ext(g.x) if callable(V_ext) else np.asarray(V_ext, dtype=float)
+    f = occupations(n_electrons)
+    k = len(f)
+    H = build_hamiltonian(g, V_ext, hbar=hbar, m=m, stencil=stencil)
+
+    if callable(mixing):
+        mixer = mixing
+    elif mixing == "linear":
+        mixer = LinearMixer(alpha)
+    elif mixing == "anderson":
+        mixer = PulayMixer(alpha, 2, g.weights)
+    elif mixing == "pulay":
+        mixer = PulayMixer(alpha, history, g.weights)
+    else:
+        raise ValueError("unknown mixing {!r}, expected one of {}".format(mixing, MIXERS))
+
+    if rho0 is None:
+        E, psi = eigensolve(H, k=k, method=method)
+        rho_in = f @ g.wavefunction(psi)**2
+    else:
+        rho_in = np.asarray(rho0, dtype=float)
+
+    log = []
+    converged = False
+    for it in range(maxiter):
+        start = time.perf_counter()
+        V_H = hartree(g, rho_in, soft)
+        t_hartree = time.perf_counter()
+        if xc is None:
+            eps_xc = V_xc = np.zeros(g.N)
+        else:
+            eps_xc, V_xc = xc(rho_in)
+        t_xc = time.perf_counter()
+        V = V_ext + V_H + V_xc
+        E, psi = eigensolve(H.with_potential(V), k=k, method=method)
+        rho_out = f @ g.wavefunction(psi)**2
+        t_solve = time.perf_counter()
+
+        residual = g.integrate(np.abs(rho_out - rho_in))
+        # The band energy counts the Hartree energy twice and the xc energy
+        # as integral V_xc rho rather than eps_xc rho.
+        total = f @ E + g.integrate(rho_in*(eps_xc - V_xc - 0.5*V_H))
+        converged = residual < tol
+        if not converged:
+            rho_in = mixer(rho_in, rho_out)
+        t_mix = time.perf_counter()
+        log.append({"residual": residual, "total_energy": total, "hartree": t_hartree - start,
+                    "xc": t_xc - t_hartree, "solve": t_solve - t_xc, "mix": t_mix - t_solve})
+        if verbose:
+            print("scf {:4d}  residual {:10.3e}  energy {:.10f}  ({:.3f}s)".format(
+                it+1, residual, total, t_mix - start), flush=True)
+        if converged:
+            break
+
+    return SCFResult(energies=E, psi=psi, occupations=f, rho=rho_out, V_H=V_H, V_xc=V_xc, V=V,
+                     total_energy=total, converged=converged, history=log)
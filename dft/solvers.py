@@ -0,0 +1,277 @@
+"""
+Eigensolvers for banded Hamiltonians.
+
+``np.linalg.eigh(H)`` finds all N eigenvalues and eigenvectors, which costs
+O(N^3) work even though we usually only look at the first few states, or at
+the bound states with E < 0. :func:`eigensolve` asks only for the states we
+need and uses a routine that knows H is banded.
+"""
+
+import numpy as np
+import scipy.linalg as scl
+
+from . import profiling
+
+# Below this size the dense solver is fast enough that it is not worth
+# using anything cleverer. For k=3 dense eigh and eigh_tridiagonal break
+# even at around 24-32 points; by 128 points dense is already 6x slower.
+DENSE_LIMIT = 32
+
+METHODS = ("auto", "dense", "tridiagonal", "banded", "sparse")
+
+
+def eigensolve(H, k=None, emax=None, method="auto", cache=None):
+    """
+    Find the lowest eigenvalues and eigenvectors of ``H``.
+
+    Parameters
+    ----------
+    H : Hamiltonian
+        The (banded) Hamiltonian.
+    k : int, optional
+        Number of states to return, counting from the lowest.
+    emax : float, optional
+        Only return states with E <= emax, e.g. ``emax=0`` for the bound
+        states of a well. If both ``k`` and ``emax`` are given, at most k
+        states below emax are returned. If neither is given, all N states
+        are returned.
+    method : str
+        One of ``"dense"`` (``np.linalg.eigh`` on the full matrix),
+        ``"tridiagonal"`` (``scl.eigh_tridiagonal``), ``"banded"``
+        (``scl.eig_banded``, for the wider stencils), ``"sparse"``
+        (Lanczos with shift-invert, from ``scipy.sparse.linalg.eigsh``), or
+        ``"auto"`` to pick one from the size and bandwidth of H. Small
+        problems always fall back to the dense solver. For the wider
+        stencils ``"auto"`` uses the sparse solver when k or emax is given:
+        ``scl.eig_banded`` first reduces H to tridiagonal form, which takes
+        O(N^2) memory and O(N^3) time, so it is only used when asked for.
+        A Numerov Hamiltonian is not banded, so it can only use the dense
+        and sparse solvers.
+    cache : SolutionCache, optional
+        Look the solution up in this :class:`dft.cache.SolutionCache` first,
+        and store it there if it was not found. Cached eigenvectors are
+        read-only memory maps unless the cache is compressed.
+
+    Returns
+    -------
+    E : ndarray, shape (n,)
+        The energies, in increasing order.
+    psi : ndarray, shape (n, N)
+        The eigenvectors, so that ``psi[n]`` is the n-th state as in the
+        notebooks. They are normalized so that ``np.sum(psi[n]**2) = 1``.
+    """
+    if method not in METHODS:
+        raise ValueError("unknown method {!r}, expected one of {}".format(method, METHODS))
+    if k is not None:
+        k = min(int(k), H.N)
+        if k < 1:
+            raise ValueError("k must be at least 1")
+    if cache is not None:
+        key = cache.key(H, k, emax)
+        with profiling.stage("cache_read"):
+            found = cache.get(key)
+        if found is not None:
+            return found
+        E, psi = eigensolve(H, k, emax, method)
+        with profiling.stage("cache_write"):
+            cache.put(key, E, psi)
+        return E, psi
+    with profiling.stage("eigensolve"):
+        return _solve(H, k, emax, method)
+
+
+def _solve(H, k, emax, method):
+    if method == "auto":
+        method = _choose_method(H, k, emax)
+    if not H.is_banded and method in ("tridiagonal", "banded"):
+        raise ValueError("a Numerov Hamiltonian is not banded, use the dense or sparse solver")
+    if method == "sparse" and (k is None and emax is None or k is not None and k >= H.N-1):
+        # Lanczos is only worth it for a few states, and eigsh cannot find
+        # more than N-1; the whole spectrum is cheaper from the dense solver.
+        method = "dense"
+
+    if method == "dense":
+        E, psi = _solve_dense(H, k, emax)
+    elif method == "sparse":
+        E, psi = _solve_sparse(H, k, emax)
+    elif method == "tridiagonal":
+        if H.bandwidth != 1:
+            raise ValueError("the tridiagonal solver needs a bandwidth of 1, not {}".format(H.bandwidth))
+        E, psi = _solve_tridiagonal(H, k, emax)
+    else:
+        E, psi = _solve_banded(H, k, emax)
+    return E, psi
+
+
+def eigensolve_warm(H, guess, tol=1e-12, maxiter=6, method="auto"):
+    """
+    Find the lowest states of ``H`` starting from a good guess.
+
+    ``guess`` holds approximate eigenvectors, shape (k, N), usually the
+    states of a nearby Hamiltonian (the previous point of a sweep). Each one
+    is improved by inverse iteration, solving (H - E_n) y = psi_n with E_n
+    its current energy, which is a banded O(N) solve, and the block of
+    results is then diagonalised (Rayleigh-Ritz) so that nearly degenerate
+    states are separated properly. Near the guess this converges in two or
+    three steps. If it does not converge the states are found from scratch
+    with :func:`eigensolve`.
+
+    The refined states are the ones closest to the guess, so this relies on
+    ``H`` being close enough to the Hamiltonian the guess came from that no
+    new state has dropped below them.
+
+    The states have converged when every residual |H psi - E psi| is
+    below ``tol`` times a bound on the norm of H. Rounding alone leaves a
+    residual of about eps |H| even for exact eigenvectors, and |H| grows
+    like 1/h^2, so an absolute tolerance would never be met on a fine grid.
+
+    Returns the energies and eigenvectors in the same layout as
+    :func:`eigensolve`.
+    """
+    with profiling.stage("eigensolve_warm"):
+        threshold = tol*_norm_bound(H)
+        X = np.array(guess, dtype=float).T
+        k = X.shape[1]
+        E = np.einsum("ij,ij->j", X, H.matvec(X))/np.einsum("ij,ij->j", X, X)
+        for it in range(maxiter):
+            Y = np.empty_like(X)
+            for n in range(k):
+                # Nudge the shift so that it never sits exactly on an eigenvalue.
+                try:
+                    Y[:, n] = H.shifted_solver(E[n] + 1e-10*max(1., abs(E[n])))(X[:, n])
+                except np.linalg.LinAlgError:
+                    return eigensolve(H, k=k, method=method)
+            Q, _ = np.linalg.qr(Y)
+            HQ = H.matvec(Q)
+            E, c = np.linalg.eigh(Q.T @ HQ)
+            X = Q @ c
+            residual = np.linalg.norm(HQ @ c - X*E, axis=0)
+            if np.all(residual <= threshold):
+                return E, X.T
+        return eigensolve(H, k=k, method=method)
+
+
+def match_states(previous, current):
+    """
+    Match the states of two neighbouring Hamiltonians by their overlap.
+
+    Returns ``perm`` such that ``current[j]`` is the continuation of
+    ``previous[perm[j]]``. Where two levels cross, the ordering by energy
+    swaps but the overlaps follow the states through the crossing.
+    """
+    from scipy.optimize import linear_sum_assignment
+    overlap = np.abs(np.asarray(previous) @ np.asarray(current).T)
+    rows, cols = linear_sum_assignment(-overlap)
+    perm = np.empty(len(cols), dtype=int)
+    perm[cols] = rows
+    return perm
+
+
+def _choose_method(H, k, emax):
+    if H.N <= DENSE_LIMIT:
+        return "dense"
+    if not H.is_banded:
+        return "sparse" if k is not None or emax is not None else "dense"
+    if H.bandwidth == 1:
+        return "tridiagonal"
+    # Shift-invert only needs the O(N) banded LU of H - sigma.
+    return "sparse" if k is not None or emax is not None else "banded"
+
+
+def _select(k, emax, lower):
+    # Translate k/emax into the select arguments shared by eigh_tridiagonal
+    # and eig_banded.
+    if emax is not None:
+        return "v", (lower, emax)
+    if k is not None:
+        return "i", (0, k-1)
+    return "a", None
+
+
+def _lower_bound(H):
+    # A value below every eigenvalue of H, so that (lower, emax] contains all
+    # the states we are after. The kinetic energy is never negative, so no
+    # state lies below the bottom of the potential.
+    return np.min(H.V) - 1.
+
+
+def _norm_bound(H):
+    # Gershgorin: |H| is at most the largest sum of the absolute values of
+    # a row. For Numerov the kinetic operator is B^-1 A, and the
+    # eigenvalues of B = (1, 10, 1)/12 are at least 2/3.
+    bands = np.abs(H.kinetic.bands)
+    N = H.N
+    rows = bands[0].copy()
+    for j in range(1, bands.shape[0]):
+        rows[:N-j] += bands[j, :N-j]
+        rows[j:] += bands[j, :N-j]
+    if not H.is_banded:
+        rows *= 1.5
+    return np.max(rows + np.abs(H.V))
+
+
+def _truncate(E, psi, k, emax):
+    keep = len(E)
+    if emax is not None:
+        keep = np.searchsorted(E, emax, side="right")
+    if k is not None:
+        keep = min(keep, k)
+    return E[:keep], psi[:keep]
+
+
+def _solve_dense(H, k, emax):
+    E, psiT = np.linalg.eigh(H.to_dense())
+    return _truncate(E, psiT.T, k, emax)
+
+
+def _rayleigh(H, psiT):
+    # Bisection only finds the eigenvalues to within about eps*|H|, and |H|
+    # grows like 1/h^2, so on very fine grids the energies lose digits. The
+    # eigenvectors are much better than that, and their Rayleigh quotients
+    # give the energies back to nearly full accuracy.
+    return np.einsum("ij,ij->j", psiT, H.matvec(psiT))
+
+
+def _solve_tridiagonal(H, k, emax):
+    bands = H.bands
+    select, select_range = _select(k, emax, _lower_bound(H))
+    if select == "v" and select_range[1] <= select_range[0]:
+        return np.zeros(0), np.zeros((0, H.N))
+    E, psiT = scl.eigh_tridiagonal(bands[0], bands[1, :-1], select=select,
+                                   select_range=select_range)
+    if select != "a":
+        E = _rayleigh(H, psiT)
+    return _truncate(E, psiT.T, k, emax)
+
+
+def _solve_banded(H, k, emax):
+    select, select_range = _select(k, emax, _lower_bound(H))
+    if select == "v" and select_range[1] <= select_range[0]:
+        return np.zeros(0), np.zeros((0, H.N))
+    E, psiT = scl.eig_banded(H.bands, lower=True, select=select,
+                             select_range=select_range)
+    if select != "a":
+        E = _rayleigh(H, psiT)
+    return _truncate(E, psiT.T, k, emax)
+
+
+def _solve_sparse(H, k, emax):
+    from scipy.sparse.linalg import LinearOperator, eigsh
+    # Shift-invert about a point just below the spectrum, so the states
+    # closest to sigma are the lowest ones.
+    sigma = _lower_bound(H)
+    solve = H.shifted_solver(sigma)
+    OPinv = LinearOperator(H.shape, matvec=solve, dtype=float)
+    nev = k if k is not None else 6
+    while True:
+        if nev >= H.N-1:
+            # Asking eigsh for this many states means nearly all of them.
+            return _solve_dense(H, k, emax)
+        E, psiT = eigsh(H.aslinearoperator(), k=nev, sigma=sigma, which="LM", OPinv=OPinv)
+        order = np.argsort(E)
+        E, psiT = E[order], psiT[:, order]
+        # With only emax to go on, keep asking for more states until we pass it.
+        if emax is None or E[-1] > emax or (k is not None and nev >= k):
+            break
+        nev *= 2
+    return _truncate(E, psiT.T, k, emax)
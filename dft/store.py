@@ -0,0 +1,106 @@
+"""
+Compact storage for the wavefunctions of a sweep.
+
+Keeping every eigenvector matrix of a sweep in a Python list quickly runs
+out of memory: 11 double well separations at N = 2048 are 11 x 2048 x 2048
+doubles, 370 MB, almost all of it unbound states nobody looks at. A
+:class:`StateStore` keeps only the states that were asked for, for every
+point of the sweep, one after the other in a single flat array. With a
+``path`` that array is a memory-mapped ``.npy`` file: each point is written
+to disk as soon as it is solved, and reading a state back only loads that
+state.
+
+    store = StateStore.open("sweep.states.npy", sizes, n_states=2)
+    store[10]           # the kept states of point 10, shape (2, N)
+    store.state(0)      # the ground state at every point, (points, N)
+
+Points can have different numbers of grid points N; :meth:`StateStore.array`
+and :meth:`StateStore.state` need them all to be the same.
+"""
+
+import numpy as np
+
+
+class StateStore:
+    """
+    The kept states of every point of a sweep.
+
+    Parameters
+    ----------
+    sizes : sequence of int
+        The number of grid points N of each point.
+    n_states : int
+        The number of states kept at each point.
+    dtype : dtype
+        ``np.float64``, or ``np.float32`` to halve the size.
+    path : str, optional
+        A ``.npy`` file to keep the states in, memory-mapped.
+    filled : array of bool, optional
+        Which points already hold states (when reopening a file).
+    """
+
+    def __init__(self, sizes, n_states, dtype=np.float64, path=None, filled=None, mode="w+"):
+        self.sizes = np.asarray(sizes, dtype=int)
+        self.n_states = int(n_states)
+        self.offsets = np.concatenate(([0], np.cumsum(self.n_states*self.sizes)))
+        self.path = path
+        shape = (int(self.offsets[-1]),)
+        if path is None:
+            self.data = np.full(shape, np.nan, dtype=dtype)
+        else:
+            self.data = np.lib.format.open_memmap(path, mode=mode, dtype=dtype, shape=shape)
+            if mode == "w+":
+                # A new file is full of zeros; mark every point unsolved.
+                self.data[:] = np.nan
+        self.filled = (np.zeros(len(self.sizes), dtype=bool) if filled is None
+                       else np.array(filled, dtype=bool))
+
+    @classmethod
+    def open(cls, path, sizes, n_states, filled=None, mode="r+"):
+        """Open an existing store; use ``mode="r"`` to only read it."""
+        data = np.load(path, mmap_mode="r")
+        store = cls(sizes, n_states, data.dtype, path, filled, mode)
+        if store.data.shape != data.shape:
+            raise ValueError("{} does not match the sizes given".format(path))
+        return store
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __getitem__(self, i):
+        """The states of point i, shape (n_states, N), or None if not stored."""
+        if not self.filled[i]:
+            return None
+        return self.data[self.offsets[i]:self.offsets[i+1]].reshape(self.n_states, self.sizes[i])
+
+    def __setitem__(self, i, states):
+        if states is None:
+            return
+        self.data[self.offsets[i]:self.offsets[i+1]] = np.asarray(states).ravel()
+        self.filled[i] = True
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def array(self):
+        """
+        All the states as one array of shape (points, n_states, N), without
+        copying. Points not yet solved are NaN.
+        """
+        if len(set(self.sizes)) > 1:
+            raise ValueError("the points have different numbers of grid points")
+        return self.data.reshape(len(self), self.n_states, self.sizes[0] if len(self) else 0)
+
+    def state(self, j):
+        """The j-th kept state at every point, shape (points, N), without copying."""
+        return self.array()[:, j]
+
+    def flush(self):
+        """Make sure everything written so far is on disk."""
+        if self.path is not None:
+            self.data.flush()
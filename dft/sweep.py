@@ -0,0 +1,394 @@
+"""
+Parameter sweeps, e.g. the double well energies as a function of separation.
+
+Every point of a sweep is an independent calculation (build the grid and
+potential, build H, solve for the lowest states), so the points are spread
+over a pool of worker processes. Only the lowest energies, plus any
+wavefunctions that were asked for, are kept.
+
+With ``continuation=True`` neighbouring points are solved one after the
+other, each starting from the states of the previous point rather than from
+scratch, and the states are followed through level crossings so that
+``result.tracked_energies()`` gives smooth E_0(b), E_1(b), ... curves.
+
+A sweep can be saved to an ``.npz`` file as it runs. Running the same sweep
+with the same file again picks up where it left off, only solving the points
+that are not in the file yet. The kept wavefunctions go to a memory-mapped
+``.states.npy`` file next to it (see :class:`dft.store.StateStore`), written
+point by point, so they never all have to fit in memory.
+
+    from dft.potentials import DoubleWell
+    from dft.sweep import run_sweep, sweep_points
+
+    points = sweep_points(b=np.linspace(0.1, 5., 200), V0=[-6., -4.])
+    result = run_sweep(DoubleWell(w=2.), points, N=2048, a=100., k=4,
+                       path="double_well.npz")
+    result.energies[:, 0]   # E_0 at every point
+"""
+
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from . import profiling
+from .hamiltonian import build_hamiltonian
+from .solvers import eigensolve, eigensolve_warm, match_states
+from .store import StateStore
+
+
+def sweep_points(**values):
+    """
+    All combinations of the given parameter values, as a list of dicts.
+
+    ``sweep_points(b=[1., 2.], V0=[-6., -4.])`` gives the four points
+    ``{"b": 1., "V0": -6.}``, ``{"b": 1., "V0": -4.}``, ... in that order.
+    """
+    names = list(values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(values[n] for n in names))]
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class SweepResult:
+    """
+    The results of a sweep.
+
+    Attributes
+    ----------
+    points : list of dict
+        The parameters of each point.
+    energies : ndarray, shape (len(points), k)
+        The lowest k energies at each point. If a point has fewer than k
+        states (e.g. with ``emax``) the rest are NaN.
+    states : StateStore or list
+        ``states[i]`` holds the kept wavefunctions of point i, shape
+        (len(keep_states), N), or None if the point has not been solved. A
+        :class:`dft.store.StateStore` if states are kept, otherwise a list
+        of None. ``states.state(j)`` gives state j at every point.
+    labels : ndarray of int, shape (len(points), k)
+        ``labels[i, j]`` identifies the state with energy ``energies[i, j]``
+        across the sweep. Without continuation this is just j. With
+        continuation a few states above the lowest k are followed too, so a
+        label can be k or more.
+    done : ndarray of bool
+        Which points have been solved.
+    """
+
+    def __init__(self, points, k, keep_states=None, sizes=None, state_dtype=np.float64,
+                 states_path=None):
+        # NumPy scalars, e.g. from sweep_points(N=np.array([...])), as the
+        # Python numbers they hold, so that they can be saved as JSON.
+        self.points = [{name: _plain(v) for name, v in p.items()} for p in points]
+        self.k = k
+        self.keep_states = None if keep_states is None else [int(n) for n in keep_states]
+        self.energies = np.full((len(points), k), np.nan)
+        if self.keep_states is None:
+            self.states = [None]*len(points)
+        else:
+            self.states = StateStore(sizes, len(self.keep_states), state_dtype, states_path)
+        self.labels = np.tile(np.arange(k), (len(points), 1))
+        self.done = np.zeros(len(points), dtype=bool)
+
+    def __len__(self):
+        return len(self.points)
+
+    def columns(self):
+        """
+        The results as a table: one column per parameter and per energy,
+        e.g. ``{"b": ..., "V0": ..., "E0": ..., "E1": ...}``.
+        """
+        names = []
+        for p in self.points:
+            names += [n for n in p if n not in names]
+        table = {n: np.array([p.get(n, np.nan) for p in self.points]) for n in names}
+        for i in range(self.k):
+            table["E{}".format(i)] = self.energies[:, i]
+        return table
+
+    def tracked_energies(self):
+        """
+        The energies arranged by state rather than by order, so that column
+        j follows one state through any level crossings. Where that state is
+        not one of the lowest k the entry is NaN.
+        """
+        tracked = np.full((len(self), self.labels.max()+1), np.nan)
+        rows = np.arange(len(self))[:, None]
+        tracked[rows, self.labels] = self.energies
+        return tracked
+
+    def save(self, path):
+        """
+        Save the sweep to an ``.npz`` file, replacing it in one step. The
+        kept states are in the ``.states.npy`` file given when the result
+        was made (see :func:`states_path`), which only needs flushing.
+        """
+        arrays = {"points": np.array(json.dumps(self.points)),
+                  "k": np.array(self.k),
+                  "keep_states": np.array(json.dumps(self.keep_states)),
+                  "energies": self.energies,
+                  "labels": self.labels,
+                  "done": self.done}
+        with profiling.stage("save"):
+            if self.keep_states is not None:
+                self.states.flush()
+                arrays["sizes"] = self.states.sizes
+            tmp = path + ".tmp.npz"
+            np.savez(tmp, **arrays)
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, mode="r+"):
+        """
+        Load a saved sweep. The kept states are memory-mapped from the
+        ``.states.npy`` file, for reading and writing unless ``mode="r"``.
+        """
+        with np.load(path) as data:
+            result = cls(json.loads(str(data["points"])), int(data["k"]))
+            result.keep_states = json.loads(str(data["keep_states"]))
+            result.energies = data["energies"].copy()
+            result.labels = data["labels"].copy()
+            result.done = data["done"].copy()
+            if result.keep_states is not None:
+                result.states = StateStore.open(states_path(path), data["sizes"],
+                                                len(result.keep_states), result.done, mode)
+        return result
+
+
+def states_path(path):
+    """The file the kept states of a sweep saved to ``path`` go in."""
+    return (path[:-4] if path.endswith(".npz") else path) + ".states.npy"
+
+
+def _hamiltonian(potential, params, N, a, hbar, m, stencil):
+    params = dict(params)
+    N = int(params.pop("N", N))
+    a = float(params.pop("a", a))
+    with profiling.stage("grid"):
+        x = np.linspace(-a/2., a/2., N)
+    with profiling.stage("potential"):
+        V = potential.replace(**params)(x) if params else potential(x)
+    return build_hamiltonian(x, V, hbar=hbar, m=m, stencil=stencil)
+
+
+def _pack(E, psi, k, keep_states):
+    # Pad the energies to length k and pick out the states to keep.
+    energies = np.full(k, np.nan)
+    energies[:len(E)] = E
+    states = None
+    if keep_states is not None:
+        states = np.full((len(keep_states), psi.shape[1]), np.nan)
+        for j, n in enumerate(keep_states):
+            if n < len(E):
+                states[j] = psi[n]
+    return energies, states
+
+
+def solve_point(potential, params, N, a, k, emax=None, keep_states=None,
+                hbar=1., m=1., method="auto", stencil=3, cache=None):
+    """
+    Solve one point of a sweep.
+
+    ``params`` holds the parameters to change in ``potential``; it may also
+    hold ``N`` and ``a`` to change the grid. Returns the energies (padded to
+    length k with NaN) and the kept wavefunctions (or None).
+    """
+    H = _hamiltonian(potential, params, N, a, hbar, m, stencil)
+    E, psi = eigensolve(H, k=k, emax=emax, method=method, cache=cache)
+    return _pack(E, psi, k, keep_states)
+
+
+def solve_path(potential, points, N, a, k, keep_states=None, hbar=1., m=1., method="auto",
+               stencil=3, guard=2):
+    """
+    Solve consecutive points of a sweep, starting each one from the states
+    of the one before (see :func:`dft.solvers.eigensolve_warm`).
+
+    ``guard`` extra states above the lowest k are followed as well, so that a
+    state coming down from above is already being tracked when it crosses
+    into the lowest k.
+
+    Returns the energies, kept states and labels of every point, where the
+    labels follow each state through level crossings and start as
+    0, 1, ..., k+guard-1 at the first point. So that separately solved paths
+    can be joined, it also returns the eigenvectors at the first and last
+    points and the labels of all k+guard states at the last point.
+    """
+    energies, states, labels = [], [], []
+    first = psi = None
+    label = np.arange(k+guard)
+    for params in points:
+        H = _hamiltonian(potential, params, N, a, hbar, m, stencil)
+        if psi is not None and psi.shape[1] == H.N:
+            previous = psi
+            E, psi = eigensolve_warm(H, previous, method=method)
+            label = label[match_states(previous, psi)]
+        else:
+            E, psi = eigensolve(H, k=k+guard, method=method)
+        if first is None:
+            first = psi
+        e, s = _pack(E[:k], psi[:k], k, keep_states)
+        energies.append(e)
+        states.append(s)
+        labels.append(label[:k])
+    return energies, states, labels, first, psi, label
+
+
+def _runs(indices, pieces, min_length=16):
+    # Split sorted indices into runs of consecutive points, then split each
+    # run into at most `pieces` paths of at least min_length points.
+    runs = np.split(indices, np.flatnonzero(np.diff(indices) != 1)+1) if len(indices) else []
+    paths = []
+    for run in runs:
+        n = max(1, min(pieces, len(run)//min_length))
+        paths += [list(p) for p in np.array_split(run, n)]
+    return paths
+
+
+def run_sweep(potential, points, N, a, k=5, emax=None, keep_states=None,
+              processes=None, path=None, hbar=1., m=1., method="auto", stencil=3,
+              continuation=False, cache=None, state_dtype=np.float64):
+    """
+    Solve ``potential`` at every point of a sweep.
+
+    Parameters
+    ----------
+    potential : Potential
+        The potential; each point changes some of its parameters with
+        :meth:`Potential.replace`.
+    points : list of dict
+        The parameters of each point, e.g. from :func:`sweep_points`. A point
+        can also set ``N`` and ``a`` to change the grid.
+    N, a : int, float
+        The default grid, ``np.linspace(-a/2., a/2., N)``.
+    k, emax : int, float
+        Keep the lowest k energies, optionally only those below emax (see
+        :func:`dft.solvers.eigensolve`).
+    keep_states : list of int, optional
+        Indices of the wavefunctions to keep at every point, e.g. ``[0, 1]``;
+        each must be less than k.
+    processes : int, optional
+        Number of worker processes. The default uses every CPU; with 1 the
+        points are solved in this process. Each worker may also use several
+        BLAS threads, so for many small problems it helps to set
+        ``OMP_NUM_THREADS=1``.
+    stencil : int or str
+        The second derivative stencil, see :func:`dft.hamiltonian.build_hamiltonian`.
+    path : str, optional
+        An ``.npz`` file to save the results to after every point. If it
+        already holds a sweep with the same points, the solved points are
+        loaded from it and skipped.
+    continuation : bool
+        Solve neighbouring points in order, warm starting each from the
+        previous one and tracking the states through level crossings. The
+        points should then be ordered along a path, e.g. increasing b. The
+        sweep is cut into a few long paths, one per worker. Where a path
+        starts right after a point loaded from ``path`` the states are
+        assumed not to cross at that step.
+    cache : SolutionCache, optional
+        Look every point up in this :class:`dft.cache.SolutionCache` before
+        solving it. Unlike ``path`` this works across different sweeps that
+        share some points. Not used with ``continuation``.
+    state_dtype : dtype
+        How to store the kept states; ``np.float32`` halves the space.
+
+    Returns
+    -------
+    SweepResult
+    """
+    if keep_states is not None and not all(0 <= n < k for n in keep_states):
+        raise ValueError("keep_states must lie between 0 and k-1 = {}, not {}".format(k-1, list(keep_states)))
+    sizes = [int(p.get("N", N)) for p in points]
+    if path is not None and os.path.exists(path):
+        result = SweepResult.load(path)
+        keep = None if keep_states is None else list(keep_states)
+        if result.points != [dict(p) for p in points] or result.k != k or result.keep_states != keep:
+            raise ValueError("{} holds a different sweep; remove it or use another path".format(path))
+    else:
+        result = SweepResult(points, k, keep_states, sizes, state_dtype,
+                             None if path is None else states_path(path))
+    todo = [i for i in range(len(result)) if not result.done[i]]
+
+    def store(i, energies, states):
+        result.energies[i] = energies
+        result.states[i] = states
+        result.done[i] = True
+        if path is not None:
+            result.save(path)
+
+    args = (N, a, k, emax, keep_states, hbar, m, method, stencil, cache)
+    if continuation:
+        if emax is not None:
+            raise ValueError("continuation follows a fixed number of states, it cannot be used with emax")
+        _run_paths(result, potential, todo, (N, a, k, keep_states, hbar, m, method, stencil), processes, path)
+    elif processes == 1:
+        for i in todo:
+            store(i, *solve_point(potential, result.points[i], *args))
+    elif todo:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {profiling.submit(pool, solve_point, potential, result.points[i], *args): i
+                       for i in todo}
+            for future in as_completed(futures):
+                store(futures[future], *future.result())
+    return result
+
+
+def _run_paths(result, potential, todo, args, processes, path):
+    paths = _runs(np.array(todo, dtype=int), processes or os.cpu_count() or 1)
+    # Each path labels its states 0, 1, ... from its first point, and they
+    # are relabelled to carry on from the point before the path. That needs
+    # the path before to be relabelled already, so the paths are taken in
+    # order and one that finishes early waits here. Nothing is saved until
+    # its labels are final, so an interrupted run never leaves path-local
+    # labels on disk.
+    finished = {}
+    fresh = result.labels[result.done].max()+1 if result.done.any() else 0
+    previous = None
+    ready = 0
+
+    def relabel(p):
+        nonlocal fresh, previous
+        energies, states, labels, first, last, last_labels = finished.pop(p)
+        start = paths[p][0]
+        mapping = np.arange(len(last_labels))
+        if start > 0 and p > 0 and paths[p-1][-1] == start-1:
+            previous_last, previous_labels = previous
+            mapping = previous_labels[match_states(previous_last, first)]
+        elif start > 0:
+            # Joined to a point loaded from disk, whose eigenvectors we do not
+            # have: assume no crossing and give the guard states new labels.
+            mapping[:result.k] = result.labels[start-1]
+            mapping[result.k:] = fresh + np.arange(len(mapping)-result.k)
+        fresh = max(fresh, mapping.max()+1)
+        for i, e, s, label in zip(paths[p], energies, states, labels):
+            result.energies[i] = e
+            result.states[i] = s
+            result.labels[i] = mapping[label]
+            result.done[i] = True
+        previous = (last, mapping[last_labels])
+
+    def store(p, out):
+        nonlocal ready
+        finished[p] = out
+        if ready not in finished:
+            return
+        while ready in finished:
+            relabel(ready)
+            ready += 1
+        if path is not None:
+            result.save(path)
+
+    if processes == 1 or len(paths) == 1:
+        for p in range(len(paths)):
+            store(p, solve_path(potential, [result.points[i] for i in paths[p]], *args))
+    elif paths:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {profiling.submit(pool, solve_path, potential, [result.points[i] for i in paths[p]],
+                                        *args): p
+                       for p in range(len(paths))}
+            for future in as_completed(futures):
+                store(futures[future], future.result())
@@ -0,0 +1,146 @@
+"""
+The time-dependent Schrödinger equation,
+
+    i hbar d psi/dt = H psi
+
+Two ways of stepping psi forward by dt are provided.
+
+Crank-Nicolson (:func:`crank_nicolson`) solves
+
+    (1 + i dt/2hbar H) psi(t + dt) = (1 - i dt/2hbar H) psi(t)
+
+which keeps psi normalised exactly and is stable for any dt. The matrix on
+the left is banded; it is LU factorised once (complex
+:meth:`dft.hamiltonian.Hamiltonian.shifted_solver`), after which every step
+is an O(N) multiply and an O(N) solve. It works with the hard walls, the
+wider stencils and uneven grids of :func:`dft.hamiltonian.build_hamiltonian`.
+
+The split-operator method (:func:`split_operator`) splits one step into
+half a step of the potential, a full step of the kinetic energy and another
+half step of the potential,
+
+    psi(t + dt) = exp(-i V dt/2hbar) IFFT exp(-i hbar k^2 dt/2m) FFT exp(-i V dt/2hbar) psi(t)
+
+The kinetic step is exact in momentum space, so this is spectrally accurate
+in x, but the FFT makes the box periodic and it needs evenly spaced points.
+The potential may change with time.
+
+Rather than keeping every step in memory, both write a snapshot every
+``stride`` steps, into a memory-mapped ``.npy`` file when ``path`` is given.
+The wavefunctions use the same normalisation as the eigenvectors of
+:func:`dft.solvers.eigensolve`, ``np.sum(abs(psi)**2) = 1``, so eigenstates
+can be used directly as initial states.
+"""
+
+import numpy as np
+
+from .grid import Grid
+from .potentials import Potential
+
+
+def gaussian_packet(x, x0, width, k0=0.):
+    """
+    A Gaussian wavepacket centred on ``x0`` with momentum ``hbar k0``,
+
+        exp(-(x - x0)^2/(4 width^2) + i k0 x)
+
+    normalised like an eigenvector on the grid ``x`` (array or Grid).
+    """
+    g = x if isinstance(x, Grid) else Grid(x)
+    phi = np.exp(-(g.x - x0)**2/(4.*width*width) + 1j*k0*g.x)
+    psi = np.sqrt(g.weights)*phi
+    return psi/np.linalg.norm(psi)
+
+
+def _snapshots(N, steps, stride, path):
+    count = steps//stride + 1
+    if path is None:
+        return np.empty((count, N), dtype=complex)
+    return np.lib.format.open_memmap(path, mode="w+", dtype=complex, shape=(count, N))
+
+
+def _run(step, psi0, dt, steps, stride, path, t0):
+    psi = np.array(psi0, dtype=complex)
+    out = _snapshots(len(psi), steps, stride, path)
+    out[0] = psi
+    for n in range(1, steps+1):
+        psi = step(psi, t0 + (n-1)*dt)
+        if n % stride == 0:
+            out[n//stride] = psi
+    if path is not None:
+        out.flush()
+    return t0 + dt*stride*np.arange(len(out)), out
+
+
+def crank_nicolson(H, psi0, dt, steps, stride=1, path=None, t0=0.):
+    """
+    Evolve ``psi0`` under the time-independent Hamiltonian ``H``.
+
+    Parameters
+    ----------
+    H : Hamiltonian
+    psi0 : array
+        The initial state, e.g. :func:`gaussian_packet` or an eigenvector.
+    dt : float
+        The time step.
+    steps : int
+        Number of steps.
+    stride : int
+        Keep a snapshot every ``stride`` steps (and the initial state).
+    path : str, optional
+        Write the snapshots to this ``.npy`` file as they are made instead
+        of keeping them in memory.
+
+    Returns
+    -------
+    t : array
+        The times of the snapshots.
+    psi : array or memmap, shape (len(t), N)
+        The snapshots.
+    """
+    hbar = H.kinetic.hbar
+    # (1 + i dt/2hbar H) = i dt/2hbar (H - 2 i hbar/dt)
+    sigma = 2j*hbar/dt
+    solve = H.shifted_solver(sigma)
+    scale = 1./(0.5j*dt/hbar)
+
+    def step(psi, t):
+        rhs = psi - 0.5j*dt/hbar*H.matvec(psi)
+        return solve(scale*rhs)
+    return _run(step, psi0, dt, steps, stride, path, t0)
+
+
+def split_operator(x, V, psi0, dt, steps, stride=1, path=None, t0=0., hbar=1., m=1.):
+    """
+    Evolve ``psi0`` by the split-operator FFT method.
+
+    ``x`` holds evenly spaced points (array or Grid), and ``V`` is the
+    potential on them, a :class:`dft.potentials.Potential` (evaluated on
+    them), or any other function ``V(t)`` returning the potential on them at
+    time t, for a potential that changes with time. The other arguments and
+    the return values are as for :func:`crank_nicolson`.
+    """
+    g = x if isinstance(x, Grid) else Grid(x)
+    if not g.is_uniform:
+        raise ValueError("the split-operator method needs evenly spaced points")
+    h = g.spacing[0]
+    k = 2.*np.pi*np.fft.fftfreq(g.N, h)
+    kinetic = np.exp(-0.5j*hbar*k*k*dt/m)
+    if isinstance(V, Potential):
+        # A function of x, not of t.
+        V = V(g.x)
+    if callable(V):
+        def half(t):
+            return np.exp(-0.5j*V(t)*dt/hbar)
+    else:
+        fixed = np.exp(-0.5j*np.asarray(V, dtype=float)*dt/hbar)
+
+        def half(t):
+            return fixed
+
+    def step(psi, t):
+        # Each half step of the potential uses V in the middle of its half.
+        psi = half(t + 0.25*dt)*psi
+        psi = np.fft.ifft(kinetic*np.fft.fft(psi))
+        return half(t + 0.75*dt)*psi
+    return _run(step, psi0, dt, steps, stride, path, t0)
@@ -0,0 +1,112 @@
+"""
+Exchange-correlation functionals in the local density approximation.
+
+In the LDA the exchange-correlation energy is an integral over the density,
+
+    E_xc = integral rho(x) eps_xc(rho(x)) dx
+
+and the potential is V_xc = d(rho eps_xc)/d rho. Each functional here takes
+the density on the grid and returns ``(eps_xc, V_xc)`` as arrays of the
+same shape, in Hartree units. They work on whole arrays at once, so for an
+SCF step they cost far less than the eigen-solve.
+
+Correlation is usually written in terms of the Wigner-Seitz radius
+r_s = (3/(4 pi rho))^(1/3), the radius of a sphere holding one electron.
+"""
+
+import functools
+
+import numpy as np
+
+# Perdew-Zunger (1981) fit to the Ceperley-Alder correlation energy of the
+# unpolarised electron gas: gamma, beta1, beta2 for r_s >= 1 and A, B, C, D
+# for r_s < 1.
+PZ81 = {"gamma": -0.1423, "beta1": 1.0529, "beta2": 0.3334,
+        "A": 0.0311, "B": -0.048, "C": 0.0020, "D": -0.0116}
+
+# Densities below this are treated as zero.
+RHO_MIN = 1e-30
+
+
+def wigner_seitz_radius(rho):
+    """r_s = (3/(4 pi rho))^(1/3)."""
+    return np.cbrt(3./(4.*np.pi*np.maximum(rho, RHO_MIN)))
+
+
+def slater_exchange(rho):
+    """
+    The Slater (LDA) exchange of ``Equations.md``,
+
+        V_x = -(3 rho/pi)^(1/3),    eps_x = 3/4 V_x
+    """
+    rho = np.maximum(np.asarray(rho, dtype=float), 0.)
+    V = -np.cbrt(3.*rho/np.pi)
+    return 0.75*V, V
+
+
+def pz81_correlation(rho):
+    """
+    The Perdew-Zunger (1981) LDA correlation,
+
+        eps_c = gamma/(1 + beta1 sqrt(r_s) + beta2 r_s)               r_s >= 1
+        eps_c = A ln r_s + B + C r_s ln r_s + D r_s                  r_s < 1
+
+    with V_c = eps_c - (r_s/3) d eps_c/d r_s.
+    """
+    p = PZ81
+    rs = wigner_seitz_radius(np.asarray(rho, dtype=float))
+    eps = np.empty_like(rs)
+    V = np.empty_like(rs)
+    low = rs >= 1.
+    r = rs[low]
+    s = np.sqrt(r)
+    denominator = 1. + p["beta1"]*s + p["beta2"]*r
+    eps[low] = p["gamma"]/denominator
+    V[low] = eps[low]*(1. + 7./6.*p["beta1"]*s + 4./3.*p["beta2"]*r)/denominator
+    high = ~low
+    r = rs[high]
+    log = np.log(r)
+    eps[high] = p["A"]*log + p["B"] + p["C"]*r*log + p["D"]*r
+    V[high] = (p["A"]*log + (p["B"] - p["A"]/3.) + 2./3.*p["C"]*r*log
+               + (2.*p["D"] - p["C"])/3.*r)
+    return eps, V
+
+
+def lda(rho):
+    """Slater exchange plus Perdew-Zunger correlation."""
+    eps_x, V_x = slater_exchange(rho)
+    eps_c, V_c = pz81_correlation(rho)
+    return eps_x + eps_c, V_x + V_c
+
+
+@functools.lru_cache(maxsize=None)
+def tabulate(functional, rho_min=1e-12, rho_max=1e4, n=2**16):
+    """
+    ``functional`` replaced by linear interpolation in a table of its values
+    at ``n`` densities spaced evenly in log(rho).
+
+    The table is built once for each functional and set of arguments. With
+    the default 65536 entries the interpolation error of :func:`lda` is
+    below 1e-7 Hartree. Densities outside [rho_min, rho_max] are passed to
+    the functional itself. For the closed forms in this module NumPy
+    evaluates the formula about as fast as the table lookup, so this is
+    only worth it for functionals that are costly to evaluate.
+    """
+    log_rho = np.linspace(np.log(rho_min), np.log(rho_max), n)
+    eps_table, V_table = functional(np.exp(log_rho))
+    step = log_rho[1] - log_rho[0]
+
+    def tabulated(rho):
+        rho = np.asarray(rho, dtype=float)
+        inside = (rho >= rho_min) & (rho <= rho_max)
+        eps = np.empty_like(rho)
+        V = np.empty_like(rho)
+        t = (np.log(rho[inside]) - log_rho[0])/step
+        i = np.minimum(t.astype(np.intp), n-2)
+        t -= i
+        eps[inside] = eps_table[i] + t*(eps_table[i+1] - eps_table[i])
+        V[inside] = V_table[i] + t*(V_table[i+1] - V_table[i])
+        if not np.all(inside):
+            eps[~inside], V[~inside] = functional(rho[~inside])
+        return eps, V
+    return tabulated
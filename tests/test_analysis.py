@@ -0,0 +1,37 @@
+import numpy as np
+
+from dft import Grid, Harmonic, build_hamiltonian, canonical_signs, eigensolve, gram, observables
+from dft.analysis import orthonormality_error
+
+
+def _oscillator():
+    g = Grid.uniform(20., 800)
+    H = build_hamiltonian(g, Harmonic()(g.x), stencil=5)
+    return g, H, eigensolve(H, k=3)
+
+
+def test_gram():
+    _, _, (E, psi) = _oscillator()
+    assert np.allclose(gram(psi), np.eye(3), atol=1e-10)
+    assert orthonormality_error(np.array([psi, 2.*psi]))[1] > 1.
+
+
+def test_observables_of_the_oscillator():
+    g, H, (E, psi) = _oscillator()
+    out = observables(psi, g, H=H, regions=[(0., np.inf)])
+    n = np.arange(3)
+    assert np.allclose(out["norm"], 1.)
+    assert np.allclose(out["x"], 0., atol=1e-10)
+    # With hbar = m = omega = 1, <x^2> = n + 1/2 and <T> = <V> (the virial theorem).
+    assert np.allclose(out["x2"], n + 0.5, atol=1e-6)
+    assert np.allclose(out["T"], out["V"], atol=1e-6)
+    assert np.allclose(out["E"], E)
+    assert np.allclose(out["P"][:, 0], 0.5, atol=1e-2)
+
+
+def test_canonical_signs():
+    _, _, (E, psi) = _oscillator()
+    flipped = canonical_signs(-psi)
+    assert np.allclose(flipped, canonical_signs(psi))
+    first = np.argmax(np.abs(flipped) > 1e-3*np.abs(flipped).max(axis=1, keepdims=True), axis=1)
+    assert np.all(flipped[np.arange(3), first] > 0)
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from dft import BlochHamiltonian, band_structure
+
+
+@pytest.mark.parametrize("method", ["dense", "sparse"])
+def test_free_particle(method):
+    # With V = 0 the bands are the folded parabola (k + 2 pi n/L)^2/2.
+    L = 2.
+    k, E = band_structure(lambda x: 0.*x, L, N=200, nbands=4, kpoints=7, stencil=5,
+                          processes=1, method=method)
+    G = 2.*np.pi/L*np.arange(-3, 4)
+    exact = np.sort(0.5*(k[:, None] + G)**2, axis=1)[:, :4]
+    assert np.allclose(E, exact, atol=1e-5)
+
+
+def test_matvec_matches_matrix():
+    rng = np.random.default_rng(0)
+    H = BlochHamiltonian(rng.standard_normal(40), 3., stencil=5)
+    psi = rng.standard_normal((40, 2)) + 1j*rng.standard_normal((40, 2))
+    for k in (0., 0.4, np.pi/3.):
+        dense = H.to_dense(k)
+        assert np.allclose(dense, dense.conj().T)
+        assert np.allclose(H.matvec(psi, k), dense @ psi)
+
+
+def test_processes_agree():
+    V = lambda x: 2.*np.cos(2.*np.pi*x)
+    serial = band_structure(V, 1., N=64, nbands=3, kpoints=9, processes=1)[1]
+    parallel = band_structure(V, 1., N=64, nbands=3, kpoints=9, processes=2)[1]
+    assert np.allclose(serial, parallel)
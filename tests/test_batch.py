@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from dft import DoubleWell, FiniteWell, build_hamiltonian, eigensolve, solve_batch
+
+
+def _check(x, V, E, psi, stencil=3):
+    for b in range(len(V)):
+        H = build_hamiltonian(x, V[b], stencil=stencil)
+        E0, psi0 = eigensolve(H, k=E.shape[1], method="dense")
+        assert np.allclose(E[b], E0, atol=1e-9)
+        assert np.allclose(np.abs(np.sum(psi[b]*psi0, axis=1)), 1., atol=1e-8)
+
+
+@pytest.mark.parametrize("N", [30, 120])
+@pytest.mark.parametrize("method", ["dense", "tridiagonal", "loop"])
+def test_methods_match_eigensolve(N, method):
+    x = np.linspace(-10., 10., N)
+    V = np.array([FiniteWell(V0=V0)(x) for V0 in np.linspace(-8., -2., 7)])
+    E, psi = solve_batch(x, V, k=3, method=method)
+    _check(x, V, E, psi)
+
+
+def test_tridiagonal_nearly_degenerate_pairs():
+    # Wide barriers split the lowest pairs by far less than the bisection
+    # tolerance; the Rayleigh-Ritz step must still separate them.
+    x = np.linspace(-30., 30., 600)
+    V = np.array([DoubleWell(b=b)(x) for b in (4., 6., 8.)])
+    E, psi = solve_batch(x, V, k=4, method="tridiagonal")
+    _check(x, V, E, psi)
+
+
+def test_wider_stencil():
+    x = np.linspace(-10., 10., 80)
+    V = np.array([FiniteWell(V0=V0)(x) for V0 in np.linspace(-8., -2., 3)])
+    E, psi = solve_batch(x, V, k=3, stencil=5)
+    _check(x, V, E, psi, stencil=5)
+    with pytest.raises(ValueError):
+        solve_batch(x, V, stencil=5, method="tridiagonal")
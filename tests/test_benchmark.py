@@ -0,0 +1,30 @@
+import copy
+
+from dft.benchmark import compare, run
+
+
+def test_run():
+    out = run(sizes=(128, 512), systems=("infinite_well", "finite_well"), solvers=("dense", "partial"),
+              dense_max=128)
+    cases = [(r["system"], r["N"], r["solver"]) for r in out["results"]]
+    # The dense solver is skipped above dense_max.
+    assert ("infinite_well", 512, "dense") not in cases
+    assert len(cases) == 6
+    for r in out["results"]:
+        assert r["build_time"] >= 0. and r["solve_time"] >= 0. and r["memory"] > 0
+    error = {(r["N"], r["solver"]): r["error"] for r in out["results"] if r["system"] == "infinite_well"}
+    # Second order: four times the points, a sixteenth of the error.
+    assert 10.*error[512, "partial"] < error[128, "partial"]
+    assert abs(error[128, "dense"] - error[128, "partial"]) < 1e-9
+    assert "numpy" in out["meta"]
+
+
+def test_compare():
+    old = run(sizes=(128,), systems=("infinite_well",), solvers=("partial",))
+    assert compare(old, old) == []
+    new = copy.deepcopy(old)
+    new["results"][0]["solve_time"] += 10.
+    new["results"][0]["memory"] *= 2
+    (regression,) = compare(old, new)
+    assert regression["case"] == ("infinite_well", 128, "partial")
+    assert regression["time_ratio"] > 1.2 and regression["memory_ratio"] == 2.
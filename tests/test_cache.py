@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+
+from dft import Grid, Harmonic, SolutionCache, build_hamiltonian, eigensolve
+
+
+def test_second_solve_is_a_hit(tmp_path):
+    cache = SolutionCache(str(tmp_path))
+    g = Grid.uniform(20., 300)
+    H = build_hamiltonian(g, Harmonic()(g.x))
+    E, psi = eigensolve(H, k=3, cache=cache)
+    E2, psi2 = eigensolve(H, k=3, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert np.array_equal(E, E2) and np.array_equal(psi, psi2)
+    other = build_hamiltonian(g, Harmonic(omega=2.)(g.x))
+    assert SolutionCache.key(other, k=3) != SolutionCache.key(H, k=3)
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = SolutionCache(str(tmp_path))
+    E, psi = np.arange(3.), np.ones((3, 100))
+    for t, key in enumerate(["a", "b"]):
+        cache.put(key, E, psi)
+        for f in cache._files(key):
+            os.utime(f, (1000.*(t+1), 1000.*(t+1)))
+    # Reading "a" makes "b" the least recently used.
+    assert cache.get("a") is not None
+    cache.max_bytes = cache.size
+    cache.put("c", E, psi)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.size <= cache.max_bytes
+
+
+def test_compressed_round_trip(tmp_path):
+    cache = SolutionCache(str(tmp_path), compress=True)
+    E, psi = np.arange(3.), np.eye(3)
+    cache.put("a", E, psi)
+    E2, psi2 = cache.get("a")
+    assert np.array_equal(E, E2) and np.array_equal(psi, psi2)
@@ -0,0 +1,57 @@
+import csv
+
+import numpy as np
+import pytest
+
+from dft import DoubleWell, SweepResult
+from dft.cli import build_potential, load_config, run_config
+
+CONFIG = """
+[grid]
+N = 301
+a = 30.0
+
+[potential]
+type = "DoubleWell"
+V0 = -6.0
+
+[solver]
+k = 3
+
+[sweep]
+b = {start = 0.5, stop = 2.0, num = 4}
+processes = 1
+
+[output]
+directory = "{directory}"
+name = "double_well"
+"""
+
+
+def _load(directory, text):
+    path = directory/"run.toml"
+    path.write_text(text.replace("{directory}", str(directory)))
+    return load_config(str(path))
+
+
+def test_build_potential():
+    assert build_potential({"type": "DoubleWell", "b": 2.}) == DoubleWell(b=2.)
+    total = build_potential([{"type": "FiniteWell"}, {"type": "Constant", "V0": 1.}])
+    assert np.allclose(total(np.array([0., 10.])), [-5., 1.])
+
+
+def test_run_config(tmp_path):
+    config = _load(tmp_path, CONFIG)
+    result = run_config(config)
+    assert len(result) == 4 and result.done.all()
+    saved = SweepResult.load(str(tmp_path/"double_well.npz"), mode="r")
+    assert np.allclose(saved.energies, result.energies)
+    with open(tmp_path/"double_well.csv") as f:
+        rows = list(csv.reader(f))
+    assert len(rows) == 5
+
+
+def test_keep_states_beyond_k(tmp_path):
+    config = _load(tmp_path, CONFIG.replace("k = 3", "k = 3\nkeep_states = [0, 3]"))
+    with pytest.raises(ValueError):
+        run_config(config)
@@ -0,0 +1,43 @@
+import tracemalloc
+
+import numpy as np
+
+from dft import Grid, Harmonic, converge, profiling
+from dft.reference import infinite_well_energies
+
+
+def test_converges_to_the_oscillator():
+    result = converge(Harmonic(), 20., k=3, tol=1e-8, stencil=5)
+    assert result.converged
+    assert np.allclose(result.energies, [0.5, 1.5, 2.5], atol=1e-7)
+
+
+def test_observed_order_of_the_three_point_stencil():
+    result = converge(lambda x: 0.*x, 1., k=2, tol=1e-7, grid=Grid.box, N0=32)
+    assert result.converged
+    assert np.allclose(result.energies, infinite_well_energies(1., 2), rtol=1e-6)
+    assert np.allclose(result.levels[-1]["observed_order"], 2., atol=0.05)
+
+
+def test_gives_up_at_nmax():
+    result = converge(Harmonic(), 20., k=1, tol=1e-14, Nmax=256)
+    assert not result.converged and result.levels[-1]["N"] == 256
+
+
+def test_memory_includes_the_potential_under_profiling():
+    # The potential is evaluated outside the nested stages, which reset the
+    # tracemalloc peak, so its temporary array must still be counted.
+    def potential(x):
+        return (np.ones((200, len(x)))*x*x).mean(axis=0)
+    before = converge(potential, 20., k=1, tol=1e-3, Nmax=256).levels[-1]["memory"]
+    tracing = tracemalloc.is_tracing()
+    profiling.enable()
+    try:
+        during = converge(potential, 20., k=1, tol=1e-3, Nmax=256).levels[-1]["memory"]
+    finally:
+        profiling.disable()
+        profiling.reset()
+        if not tracing:
+            tracemalloc.stop()
+    assert during > 0.5*before
+    assert during > 200*256*8
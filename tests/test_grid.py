@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from dft import Coulomb, Grid, Harmonic, build_hamiltonian, build_hamiltonian_nd, eigensolve, solve_batch
+
+
+def test_weights_and_walls():
+    g = Grid(np.array([0., 1., 3., 6.]))
+    assert np.allclose(g.spacing, [1., 1., 2., 3., 3.])
+    assert np.allclose(g.weights, [1., 1.5, 2.5, 3.])
+    assert not g.is_uniform
+    assert Grid.box(2., 9).is_uniform
+
+
+def test_long_fine_grid_is_uniform():
+    # Rounding in linspace must not make an even grid look uneven.
+    assert Grid.uniform(100., 2**20).is_uniform
+
+
+def test_sinh_grid_oscillator():
+    g = Grid.sinh(30., 600, stretch=3.)
+    E, psi = eigensolve(build_hamiltonian(g, Harmonic()(g.x)), k=3)
+    assert np.allclose(E, [0.5, 1.5, 2.5], atol=1e-3)
+    assert np.isclose(g.integrate(g.wavefunction(psi[0])**2), 1.)
+
+
+def test_uneven_array_is_not_taken_as_even():
+    r = np.geomspace(1e-4, 80., 2000)
+    V = Coulomb()(r)
+    E = eigensolve(build_hamiltonian(r, V), k=2)[0]
+    assert np.allclose(E, eigensolve(build_hamiltonian(Grid(r), V), k=2)[0])
+    assert np.allclose(E, [-0.5, -0.125], atol=1e-3)
+    assert np.allclose(solve_batch(r, V[None], k=2)[0][0], E)
+    with pytest.raises(ValueError):
+        build_hamiltonian(r, V, stencil=5)
+    with pytest.raises(ValueError):
+        build_hamiltonian_nd([r[:20], r[:20]], lambda x, y: x + y, stencil=5)
@@ -0,0 +1,15 @@
+import numpy as np
+import pytest
+
+from dft import Grid, Harmonic, build_hamiltonian, eigensolve
+from dft import imaginary_time, lobpcg
+
+
+@pytest.mark.parametrize("solver", [imaginary_time, lobpcg])
+def test_matches_eigensolve(solver):
+    g = Grid.uniform(16., 300)
+    H = build_hamiltonian(g, Harmonic()(g.x))
+    E, psi = solver(H, k=2)
+    E0, psi0 = eigensolve(H, k=2)
+    assert np.allclose(E, E0, atol=1e-7)
+    assert np.allclose(np.abs(np.sum(psi*psi0, axis=1)), 1., atol=1e-4)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from dft import Grid, build_hamiltonian
+from dft.reference import infinite_well_energies
+
+
+def test_infinite_well():
+    a = 2.
+    g = Grid.box(a, 400)
+    H = build_hamiltonian(g, np.zeros(g.N))
+    E = np.linalg.eigvalsh(H.to_dense())
+    assert np.allclose(E[:3], infinite_well_energies(a, 3), rtol=1e-3)
+
+
+def test_matvec_matches_dense():
+    rng = np.random.default_rng(0)
+    g = Grid.uniform(10., 60)
+    H = build_hamiltonian(g, g.x**2)
+    psi = rng.standard_normal((60, 3))
+    assert np.allclose(H.matvec(psi), H.to_dense() @ psi)
+    assert np.allclose(H.to_sparse() @ psi, H.to_dense() @ psi)
+
+
+def test_shifted_solver():
+    rng = np.random.default_rng(1)
+    g = Grid.uniform(10., 80)
+    H = build_hamiltonian(g, g.x**2)
+    b = rng.standard_normal(80)
+    for sigma in (0.3, 2.+1j):
+        y = H.shifted_solver(sigma)(b)
+        assert np.allclose(H.matvec(y) - sigma*y, b)
+
+
+@pytest.mark.parametrize("stencil, tol", [(5, 1e-6), (7, 1e-8), (9, 1e-9), ("numerov", 1e-6)])
+def test_wider_stencils_on_the_infinite_well(stencil, tol):
+    a = 2.
+    g = Grid.box(a, 400)
+    H = build_hamiltonian(g, np.zeros(g.N), stencil=stencil)
+    E = np.sort(np.linalg.eigvals(H.to_dense()).real)
+    assert np.allclose(E[:3], infinite_well_energies(a, 3), rtol=tol)
+
+
+@pytest.mark.parametrize("stencil", [5, 9, "numerov"])
+def test_wider_stencils_match_dense(stencil):
+    rng = np.random.default_rng(0)
+    g = Grid.uniform(10., 60)
+    H = build_hamiltonian(g, g.x**2, stencil=stencil)
+    psi = rng.standard_normal((60, 3))
+    assert np.allclose(H.matvec(psi), H.to_dense() @ psi)
+    if H.is_banded:
+        assert np.allclose(H.to_sparse() @ psi, H.to_dense() @ psi)
+    y = H.shifted_solver(0.3)(psi[:, 0])
+    assert np.allclose(H.matvec(y) - 0.3*y, psi[:, 0])
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from dft import Grid, hartree, hartree_direct, hartree_fft, hartree_radial
+
+
+def test_fft_matches_direct():
+    x = np.linspace(-15., 15., 501)
+    rho = np.exp(-(x - 1.)**2) + 0.5*np.exp(-2.*(x + 2.)**2)
+    V = hartree_direct(x, rho, soft=0.7)
+    assert np.allclose(hartree_fft(x, rho, soft=0.7), V, atol=1e-12)
+    assert np.allclose(hartree(x, rho, soft=0.7), V, atol=1e-12)
+
+
+def test_fft_needs_even_spacing():
+    with pytest.raises(ValueError):
+        hartree_fft(Grid.sinh(10., 101), np.ones(101))
+
+
+def test_point_charge_far_away():
+    # Far from a narrow, normalised density the potential is 1/sqrt(x^2 + soft^2).
+    x = np.linspace(-50., 50., 2001)
+    rho = np.exp(-x*x/0.01)
+    rho /= np.sum(rho)*(x[1] - x[0])
+    V = hartree_fft(x, rho)
+    assert np.allclose(V[-1], 1./np.sqrt(50.**2 + 1.), rtol=1e-4)
+
+
+def test_radial_hydrogen():
+    # The 1s density exp(-2r)/pi gives 1/r - (1 + 1/r) exp(-2r).
+    r = Grid.log(1e-4, 40., 4000)
+    rho = np.exp(-2.*r.x)/np.pi
+    exact = 1./r.x - (1. + 1./r.x)*np.exp(-2.*r.x)
+    assert np.allclose(hartree_radial(r, rho), exact, atol=1e-5)
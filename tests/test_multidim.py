@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from dft import build_hamiltonian_nd, eigensolve_nd
+
+
+@pytest.mark.parametrize("method", ["sparse", "lobpcg"])
+def test_two_dimensional_oscillator(method):
+    x = np.linspace(-8., 8., 60)
+    H = build_hamiltonian_nd([x, x], lambda x, y: 0.5*(x*x + y*y), stencil=5)
+    E, psi = eigensolve_nd(H, k=3, method=method)
+    assert np.allclose(E, [1., 2., 2.], atol=1e-3)
+
+
+def test_three_dimensional_oscillator():
+    x = np.linspace(-6., 6., 48)
+    H = build_hamiltonian_nd([x, x, x], lambda x, y, z: 0.5*(x*x + y*y + z*z), stencil=5)
+    E, psi = eigensolve_nd(H, k=4)
+    assert np.allclose(E, [1.5, 2.5, 2.5, 2.5], atol=1e-3)
+    assert np.allclose(psi @ psi.T, np.eye(4), atol=1e-6)
+
+
+def test_lobpcg_raises_when_not_converged():
+    x = np.linspace(-8., 8., 60)
+    H = build_hamiltonian_nd([x, x], lambda x, y: 0.5*(x*x + y*y))
+    with pytest.warns(UserWarning), pytest.raises(RuntimeError):
+        eigensolve_nd(H, k=3, method="lobpcg", maxiter=3)
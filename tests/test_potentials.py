@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from dft import Constant, Coulomb, DoubleWell, FiniteWell, Harmonic, Piecewise
+from dft.potentials import Scaled, Sum
+
+x = np.linspace(-5., 5., 101)
+
+
+def test_square_wells():
+    V = FiniteWell(V0=-3., b=2.)(x)
+    assert np.all(V[np.abs(x) < 1.] == -3.) and np.all(V[np.abs(x) > 1.] == 0.)
+    V = DoubleWell(V0=-3., w=1., b=2.)(x)
+    assert np.all(V[(np.abs(x) > 1.) & (np.abs(x) < 2.)] == -3.)
+    assert np.all(V[(np.abs(x) < 1.) | (np.abs(x) > 2.)] == 0.)
+
+
+def test_piecewise():
+    V = Piecewise(edges=(-1., 0., 1.), values=(2., 3.), outside=-1.)
+    assert np.array_equal(V(np.array([-2., -0.5, 0.5, 2.])), [-1., 2., 3., -1.])
+    with pytest.raises(ValueError):
+        Piecewise(edges=(0., 1.), values=(1., 2.))
+
+
+def test_coulomb_softening():
+    assert np.allclose(Coulomb(Z=2., soft=1.)(np.array([0., 1.])), [-2., -2./np.sqrt(2.)])
+
+
+def test_sum_and_scale():
+    V = 2.*FiniteWell() + Harmonic() + 0.5
+    assert isinstance(V, Sum) and len(V.terms) == 3
+    assert np.allclose(V(x), 2.*FiniteWell()(x) + 0.5*x*x + 0.5)
+    assert np.allclose((-Harmonic())(x), -Harmonic()(x))
+    assert np.allclose(sum([FiniteWell(), Constant(1.)])(x), FiniteWell()(x) + 1.)
+
+
+def test_replace():
+    V = DoubleWell() + Harmonic(omega=0.1)
+    W = V.replace(b=3., omega=0.2)
+    assert W.terms == (DoubleWell(b=3.), Harmonic(omega=0.2))
+    with pytest.raises(TypeError):
+        V.replace(nonsense=1.)
+    scaled = Scaled(FiniteWell(), 2.).replace(b=4., factor=3.)
+    assert scaled == Scaled(FiniteWell(b=4.), 3.)
+    # Potentials are hashable, so they can key caches and sweeps.
+    assert hash(DoubleWell(b=2.)) == hash(DoubleWell().replace(b=2.))
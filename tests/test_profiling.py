@@ -0,0 +1,52 @@
+import tracemalloc
+
+import numpy as np
+
+from dft import Grid, Harmonic, build_hamiltonian, eigensolve, profiling
+
+
+def test_off_by_default():
+    assert profiling.stage("anything").wall is None
+
+
+def test_nested_stages():
+    tracing = tracemalloc.is_tracing()
+    profiling.reset()
+    profiling.enable()
+    try:
+        with profiling.stage("outer") as outer:
+            big = np.ones(10**6)
+            del big
+            g = Grid.uniform(20., 200)
+            eigensolve(build_hamiltonian(g, Harmonic()(g.x)), k=2)
+        stages = {s["stage"]: s for s in profiling.report()["stages"]}
+    finally:
+        profiling.disable()
+        profiling.reset()
+        if not tracing:
+            tracemalloc.stop()
+    assert {"outer", "outer/hamiltonian", "outer/eigensolve"} <= set(stages)
+    # The peak of the outer stage covers what it allocated before the inner ones.
+    assert outer.memory >= 8*10**6
+    assert stages["outer"]["total"] >= stages["outer/eigensolve"]["total"]
+
+
+def test_blas_threads_looked_up_once(monkeypatch):
+    calls = []
+
+    def counted():
+        calls.append(None)
+        return 4
+    monkeypatch.setattr(profiling, "blas_threads", counted)
+    profiling.reset()
+    profiling.enable(memory=False)
+    try:
+        for _ in range(5):
+            with profiling.stage("step"):
+                pass
+        recorded = profiling.records()
+    finally:
+        profiling.disable()
+        profiling.reset()
+    assert len(calls) == 1
+    assert [r["blas_threads"] for r in recorded] == [4]*5
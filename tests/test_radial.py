@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+from dft import Coulomb, solve_atom
+from dft.reference import hydrogen_energies
+
+
+@pytest.mark.parametrize("Z", [1., 3.])
+def test_hydrogen_like_levels(Z):
+    # The default grid follows the charge of the nucleus.
+    channels = solve_atom(Coulomb(Z=Z), lmax=1, k=2, processes=1)
+    exact = hydrogen_energies(3, Z=Z)
+    assert np.allclose(channels[0][0], exact[:2], rtol=1e-4)
+    assert np.allclose(channels[1][0], exact[1:3], rtol=1e-4)
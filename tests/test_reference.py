@@ -0,0 +1,47 @@
+import numpy as np
+
+from dft import DoubleWell, FiniteWell, Grid, build_hamiltonian, eigensolve
+from dft.reference import (double_well_energies, finite_well_energies, finite_well_roots,
+                           finite_well_table, hydrogen_energies)
+
+
+def test_finite_well_roots_solve_the_matching_conditions():
+    z0 = np.array([0.5, 2., 7.3])
+    z = finite_well_roots(z0)
+    for i, row in enumerate(z):
+        for j, root in enumerate(row[~np.isnan(row)]):
+            outside = np.sqrt(z0[i]**2 - root**2)
+            inside = root*np.tan(root) if j % 2 == 0 else -root/np.tan(root)
+            assert abs(inside - outside) < 1e-9*max(1., z0[i])
+    # A well always has one bound state, and z0 = 7.3 has ceil(2 z0/pi) = 5.
+    assert np.sum(~np.isnan(z[0])) == 1
+    assert np.sum(~np.isnan(z[2])) == 5
+
+
+def test_finite_well_table_matches_single_wells():
+    V0 = np.array([-2., -6., -10.])
+    table = finite_well_table(V0, 2.)
+    for row, depth in zip(table, V0):
+        E = finite_well_energies(depth, 2.)
+        assert np.allclose(row[:len(E)], E)
+        assert np.all(np.isnan(row[len(E):]))
+
+
+def _numerical(potential, k):
+    # Spacing 0.01, with the edges of the wells half way between points.
+    g = Grid.uniform(30.01, 3002)
+    return eigensolve(build_hamiltonian(g, potential(g.x), stencil=5), k=k)[0]
+
+
+def test_finite_well_energies():
+    exact = finite_well_energies(-6., 2.)
+    assert np.allclose(_numerical(FiniteWell(V0=-6., b=2.), len(exact)), exact, atol=2e-3)
+
+
+def test_double_well_energies():
+    exact = double_well_energies(-6., 2., 1.)
+    assert np.allclose(_numerical(DoubleWell(V0=-6., w=2., b=1.), len(exact)), exact, atol=2e-3)
+
+
+def test_hydrogen_energies():
+    assert np.allclose(hydrogen_energies(3, Z=2.), [-2., -0.5, -2./9.])
@@ -0,0 +1,44 @@
+import numpy as np
+
+from dft import Constant, DoubleWell, FiniteWell, Harmonic, Piecewise, resonances, transmission
+from dft.reference import finite_well_energies
+from dft.scattering import potential_edges
+
+
+def test_rectangular_barrier():
+    V0, d = 2., 1.5
+    E = np.linspace(0.1, 1.9, 19)
+    T, R = transmission(Piecewise(edges=(0., d), values=(V0,)), E)
+    kappa = np.sqrt(2.*(V0 - E))
+    exact = 1./(1. + V0**2*np.sinh(kappa*d)**2/(4.*E*(V0 - E)))
+    assert np.allclose(T, exact, rtol=1e-12)
+    assert np.allclose(T + R, 1.)
+
+
+def test_sampled_potential_conserves_flux():
+    E = np.linspace(0.5, 5., 10)
+    T, R = transmission(lambda x: np.exp(-x*x), E, x=np.linspace(-6., 6., 400))
+    assert np.allclose(T + R, 1.)
+
+
+def test_constant_has_no_edges():
+    assert len(potential_edges(Constant(1.))) == 0
+    assert np.allclose(potential_edges(DoubleWell() + 0.5), potential_edges(DoubleWell()))
+    assert potential_edges(Harmonic()) is None
+    E = np.linspace(0.1, 4., 20)
+    # A constant shift only moves the spectrum.
+    assert np.allclose(transmission(FiniteWell() + 0.5, E + 0.5)[0], transmission(FiniteWell(), E)[0])
+    T, R = transmission(Constant(1.), E)
+    assert np.array_equal(T, (E > 1.).astype(float))
+
+
+def test_double_barrier_resonance():
+    barriers = Piecewise(edges=(-2., -1.5, 1.5, 2.), values=(5., 0., 5.))
+    E = np.linspace(0.05, 2., 4000)
+    T, _ = transmission(barriers, E)
+    energies, gamma, peaks = resonances(E, T)
+    # Close to the levels of a well of the same depth with thick walls,
+    # which the thin barriers let leak out.
+    assert np.allclose(energies[:2], finite_well_energies(-5., 3.)[:2] + 5., rtol=0.05)
+    assert np.allclose(peaks, 1., atol=1e-2)
+    assert np.all(gamma > 0)
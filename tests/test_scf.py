@@ -0,0 +1,15 @@
+import numpy as np
+
+from dft import Grid, Harmonic, scf
+
+
+def test_two_electrons_in_an_oscillator():
+    g = Grid.uniform(20., 400)
+    result = scf(g, Harmonic(), 2, tol=1e-8)
+    assert result.converged
+    assert np.isclose(np.sum(g.weights*result.rho), 2.)
+    # The repulsion between the electrons pushes the level up.
+    assert result.energies[0] > 0.5
+    # Pulay and linear mixing find the same ground state.
+    linear = scf(g, Harmonic(), 2, tol=1e-8, mixing="linear", alpha=0.3)
+    assert np.isclose(linear.total_energy, result.total_energy, atol=1e-6)
@@ -0,0 +1,110 @@
+import time
+
+import numpy as np
+import pytest
+
+from dft import DoubleWell, Grid, Harmonic, build_hamiltonian, eigensolve, solvers
+from dft.solvers import eigensolve_warm, match_states
+
+
+def _harmonic(N, stencil=3):
+    g = Grid.uniform(20., N)
+    return build_hamiltonian(g, Harmonic()(g.x), stencil=stencil)
+
+
+@pytest.mark.parametrize("method", ["tridiagonal", "sparse"])
+def test_methods_match_dense(method):
+    H = _harmonic(200)
+    E0, psi0 = eigensolve(H, k=4, method="dense")
+    E, psi = eigensolve(H, k=4, method=method)
+    assert np.allclose(E, E0, atol=1e-9)
+    # The same states, up to sign.
+    assert np.allclose(np.abs(np.sum(psi*psi0, axis=1)), 1., atol=1e-8)
+
+
+def test_harmonic_energies():
+    E, psi = eigensolve(_harmonic(2000), k=5)
+    assert np.allclose(E, np.arange(5) + 0.5, atol=1e-4)
+    assert np.allclose(psi @ psi.T, np.eye(5), atol=1e-10)
+
+
+def test_emax():
+    H = _harmonic(300)
+    for method in ("auto", "sparse"):
+        E, psi = eigensolve(H, emax=3., method=method)
+        assert np.allclose(E, [0.5, 1.5, 2.5], atol=5e-3)
+        assert psi.shape == (3, 300)
+
+
+@pytest.mark.parametrize("k", [38, 39, 40])
+def test_sparse_returns_every_state_asked_for(k):
+    # eigsh finds at most N-1 states; asking for more goes to the dense solver.
+    E, psi = eigensolve(_harmonic(40), k=k, method="sparse")
+    assert len(E) == k and psi.shape == (k, 40)
+
+
+@pytest.mark.parametrize("stencil", [5, 7])
+@pytest.mark.parametrize("method", ["banded", "sparse"])
+def test_wider_stencils_match_dense(stencil, method):
+    H = _harmonic(200, stencil)
+    E0, psi0 = eigensolve(H, k=4, method="dense")
+    E, psi = eigensolve(H, k=4, method=method)
+    assert np.allclose(E, E0, atol=1e-9)
+    assert np.allclose(np.abs(np.sum(psi*psi0, axis=1)), 1., atol=1e-8)
+
+
+def test_higher_order_converges_faster():
+    E3 = eigensolve(_harmonic(400, 3), k=3)[0]
+    E5 = eigensolve(_harmonic(400, 5), k=3)[0]
+    exact = np.arange(3) + 0.5
+    assert np.abs(E5 - exact).max() < 1e-2*np.abs(E3 - exact).max()
+
+
+@pytest.mark.parametrize("stencil", [5, 9])
+def test_auto_avoids_dense_banded_solver(stencil):
+    # eig_banded is O(N^3); for a few states shift-invert is O(N).
+    assert solvers._choose_method(_harmonic(1000, stencil), 4, None) == "sparse"
+
+
+def _double_wells(N, b):
+    g = Grid.uniform(60., N)
+    return [build_hamiltonian(g, DoubleWell(b=bi)(g.x)) for bi in b]
+
+
+def test_warm_matches_cold():
+    H0, H1 = _double_wells(2001, [1., 1.1])
+    _, guess = eigensolve(H0, k=4)
+    E, psi = eigensolve_warm(H1, guess)
+    E_cold, psi_cold = eigensolve(H1, k=4)
+    assert np.allclose(E, E_cold, atol=1e-10)
+    assert np.allclose(np.abs(np.sum(psi*psi_cold, axis=1)), 1., atol=1e-8)
+
+
+def test_warm_beats_cold(monkeypatch):
+    # On a fine grid the warm start should converge by itself, without
+    # falling back to a cold solve, and be quicker than one.
+    H0, H1 = _double_wells(50001, [1., 1.1])
+    _, guess = eigensolve(H0, k=4)
+    cold = []
+
+    def counted(*args, **kwargs):
+        cold.append(args)
+        return eigensolve(*args, **kwargs)
+    monkeypatch.setattr(solvers, "eigensolve", counted)
+
+    def best(f):
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            f()
+            times.append(time.perf_counter() - start)
+        return min(times)
+    warm = best(lambda: eigensolve_warm(H1, guess))
+    assert not cold
+    assert warm < best(lambda: eigensolve(H1, k=4))
+
+
+def test_match_states_follows_a_swap():
+    rng = np.random.default_rng(2)
+    Q = np.linalg.qr(rng.standard_normal((50, 3)))[0].T
+    assert list(match_states(Q, Q[[2, 0, 1]])) == [2, 0, 1]
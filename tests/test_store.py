@@ -0,0 +1,21 @@
+import numpy as np
+
+from dft import FiniteWell, StateStore, SweepResult, run_sweep, sweep_points
+
+
+def test_kept_states_saved(tmp_path):
+    path = str(tmp_path/"sweep.npz")
+    points = sweep_points(V0=[-3., -5.])
+    result = run_sweep(FiniteWell(), points, N=201, a=10., k=3, keep_states=[0, 1],
+                       processes=1, path=path)
+    loaded = SweepResult.load(path, mode="r")
+    assert np.allclose(loaded.energies, result.energies)
+    assert np.allclose(loaded.states.array(), result.states.array())
+
+
+def test_store_starts_unsolved(tmp_path):
+    for path in (None, str(tmp_path/"states.npy")):
+        store = StateStore([5, 5, 5], 2, path=path)
+        store[1] = np.ones((2, 5))
+        assert np.all(np.isnan(store.array()[[0, 2]]))
+        assert store[0] is None and np.all(store[1] == 1.)
@@ -0,0 +1,50 @@
+import numpy as np
+
+from dft import DoubleWell, FiniteWell, SweepResult, run_sweep, sweep_points
+from dft.reference import finite_well_table
+
+
+def test_sweep_matches_reference():
+    points = sweep_points(V0=[-2., -4., -6.])
+    # Spacing 0.01, with the edges of the well half way between points.
+    result = run_sweep(FiniteWell(), points, N=1502, a=15.01, k=2, processes=1)
+    exact = finite_well_table(np.array([-2., -4., -6.]), 2., n=2)
+    assert np.allclose(result.energies, exact, atol=1e-3)
+
+
+def test_parallel_sweep_matches_serial():
+    points = sweep_points(b=np.linspace(0.5, 3., 6))
+    serial = run_sweep(DoubleWell(), points, N=301, a=30., k=3, processes=1)
+    parallel = run_sweep(DoubleWell(), points, N=301, a=30., k=3, processes=2)
+    assert np.allclose(serial.energies, parallel.energies)
+
+
+def test_integer_sweep_saves_and_resumes(tmp_path):
+    # NumPy integers in the points must survive the trip through JSON.
+    path = str(tmp_path/"sweep.npz")
+    points = sweep_points(N=np.array([201, 401]), V0=np.array([-4, -6]))
+    result = run_sweep(FiniteWell(), points, N=101, a=10., k=2, processes=1, path=path)
+    loaded = SweepResult.load(path)
+    assert loaded.points == [{"N": 201, "V0": -4}, {"N": 201, "V0": -6},
+                             {"N": 401, "V0": -4}, {"N": 401, "V0": -6}]
+    assert np.allclose(loaded.energies, result.energies)
+    loaded.done[2:] = False
+    loaded.save(path)
+    resumed = run_sweep(FiniteWell(), points, N=101, a=10., k=2, processes=1, path=path)
+    assert np.allclose(resumed.energies, result.energies)
+
+
+def test_resumed_continuation_keeps_labels(tmp_path):
+    points = sweep_points(b=np.linspace(0.2, 4., 24))
+    args = dict(N=301, a=30., k=4, continuation=True)
+    whole = run_sweep(DoubleWell(), points, processes=1, **args)
+
+    path = str(tmp_path/"sweep.npz")
+    run_sweep(DoubleWell(), points, processes=1, path=path, **args)
+    # Pretend the run stopped part way through, and finish it in paths.
+    partial = SweepResult.load(path)
+    partial.done[9:] = False
+    partial.save(path)
+    resumed = run_sweep(DoubleWell(), points, processes=3, path=path, **args)
+    assert np.array_equal(resumed.labels, whole.labels)
+    assert np.allclose(resumed.energies, whole.energies)
@@ -0,0 +1,35 @@
+import numpy as np
+
+from dft import (DoubleWell, Grid, Harmonic, build_hamiltonian, crank_nicolson, eigensolve,
+                 gaussian_packet, split_operator)
+
+
+def test_crank_nicolson_keeps_eigenstates():
+    g = Grid.uniform(20., 400)
+    H = build_hamiltonian(g, Harmonic()(g.x))
+    E, psi = eigensolve(H, k=2)
+    t, out = crank_nicolson(H, psi[1], 0.01, 200, stride=50)
+    assert np.allclose(np.linalg.norm(out, axis=1), 1.)
+    # Only the phase exp(-i E t) changes.
+    assert np.allclose(np.abs(out @ psi[1]), 1., atol=1e-8)
+
+
+def test_split_operator_coherent_state():
+    # A displaced ground state of the oscillator swings back after one period.
+    g = Grid.uniform(30., 512)
+    psi0 = gaussian_packet(g, 3., np.sqrt(0.5))
+    t, out = split_operator(g, Harmonic()(g.x), psi0, 2.*np.pi/1000, 1000, stride=500)
+    assert np.allclose(np.linalg.norm(out, axis=1), 1.)
+    assert abs(np.vdot(psi0, out[-1])) > 0.999
+    assert np.sum(np.abs(out[1])**2*g.x) < -2.9
+
+
+def test_split_operator_takes_potentials():
+    g = Grid.uniform(40., 256)
+    psi0 = gaussian_packet(g, -5., 1., k0=2.)
+    V = DoubleWell()
+    _, fixed = split_operator(g, V(g.x), psi0, 0.01, 20, stride=20)
+    _, potential = split_operator(g, V, psi0, 0.01, 20, stride=20)
+    _, timed = split_operator(g, lambda t: V(g.x), psi0, 0.01, 20, stride=20)
+    assert np.allclose(potential, fixed)
+    assert np.allclose(timed, fixed)
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from dft.xc import lda, pz81_correlation, slater_exchange, tabulate
+
+
+def _density(rs):
+    return 3./(4.*np.pi*np.asarray(rs)**3)
+
+
+def test_pz81_is_continuous_at_rs_1():
+    # The two branches of the fit meet at r_s = 1 to the accuracy of its
+    # published coefficients.
+    eps, V = pz81_correlation(_density([1. - 1e-9, 1. + 1e-9]))
+    assert np.isclose(eps[0], eps[1], atol=1e-4)
+    assert np.isclose(V[0], V[1], atol=1e-4)
+
+
+@pytest.mark.parametrize("functional", [slater_exchange, pz81_correlation, lda])
+def test_potential_is_derivative_of_energy_density(functional):
+    rho = np.geomspace(1e-6, 1e3, 50)
+    h = 1e-6*rho
+    up = (rho + h)*functional(rho + h)[0]
+    down = (rho - h)*functional(rho - h)[0]
+    assert np.allclose((up - down)/(2.*h), functional(rho)[1], atol=1e-8)
+
+
+def test_tabulated_lda():
+    rho = np.geomspace(1e-14, 1e5, 1000)
+    assert np.allclose(tabulate(lda)(rho), lda(rho), rtol=0., atol=1e-7)